@@ -5,23 +5,279 @@ Export functions for ArcGIS File Geodatabase (.gdb)
 
 import os
 import shutil
-from osgeo import ogr
-from qgis.core import QgsProject, QgsFeatureRequest
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from osgeo import gdal, ogr
+from qgis.core import (
+    Qgis,
+    QgsProject,
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsFields,
+    QgsExpression,
+    QgsMessageLog,
+    QgsProviderRegistry,
+    QgsVectorLayerFeatureSource,
+    QgsWkbTypes,
+)
+from qgis.PyQt.QtCore import QVariant, QDate, QDateTime, QTime
 
 from .field_mappings import (
-    PUNKT_TO_COM_DOKU_PUNKT,
-    ROHRMUFFE_TO_COM_DOKU_PUNKT,
-    MESSPUNKT_TO_COM_DOKU_PUNKT,
-    BAUTEN_TO_COM_DOKU_PUNKT,
-    NETZTECHNIK_TO_COM_DOKU_PUNKT,
-    ENDVERBRAUCHER_TO_COM_DOKU_PUNKT,
-    LEERROHRE_TO_COM_DOKU_ROHR,
-    VERBINDUNGEN_TO_COM_DOKU_KABEL,
+    PUNKT_TO_COM_DOKU_PUNKT_ITEMS,
+    ROHRMUFFE_TO_COM_DOKU_PUNKT_ITEMS,
+    MESSPUNKT_TO_COM_DOKU_PUNKT_ITEMS,
+    BAUTEN_TO_COM_DOKU_PUNKT_ITEMS,
+    NETZTECHNIK_TO_COM_DOKU_PUNKT_ITEMS,
+    ENDVERBRAUCHER_TO_COM_DOKU_PUNKT_ITEMS,
+    LEERROHRE_TO_COM_DOKU_ROHR_ITEMS,
+    VERBINDUNGEN_TO_COM_DOKU_KABEL_ITEMS,
     TEMPLATE_GDB_NAME,
     GDB_FEATURE_CLASSES,
+    SONSTIGE_VALUES,
 )
 
 
+def _is_son(value):
+    """True if a display value is 'Sonstige'/'Sonstiges' (str() only for non-string values)"""
+    return value is not None and (value if type(value) is str else str(value)) in SONSTIGE_VALUES
+
+
+def _art_sonst_rule(exporter, layer_defn, fields, cache):
+    """BAUTEN/NETZTECHNIK: if ART='Sonstiges' or 'Sonstige', use ART_SONST value"""
+    art_idx = layer_defn.GetFieldIndex('ART')
+    art_sonst_idx = fields.indexFromName('ART_SONST')
+    
+    def post_transform(ogr_feature, qgis_feature):
+        if ogr_feature.GetField(art_idx) in SONSTIGE_VALUES:
+            art_sonst = exporter.to_ogr_value(qgis_feature.attribute(art_sonst_idx))
+            if art_sonst:
+                ogr_feature.SetField(art_idx, art_sonst)
+    
+    # Nothing to replace without both fields
+    return post_transform if art_idx >= 0 and art_sonst_idx >= 0 else None
+
+
+def _leerrohre_rules(exporter, layer_defn, fields, cache):
+    """Leerrohre: LR_FARBE based on TYP, LR_HERST='Sonstige' uses LR_HER_SON"""
+    lr_herst_idx = layer_defn.GetFieldIndex('LR_HERST')
+    lr_farbe_idx = layer_defn.GetFieldIndex('LR_FARBE')
+    m_farb_son_idx = fields.indexFromName('M_FARB_SON')
+    er_farb_son_idx = fields.indexFromName('ER_FARB_SON')
+    lr_her_son_idx = fields.indexFromName('LR_HER_SON')
+    typ_idx = fields.indexFromName('TYP')
+    m_farb_display = exporter.display_resolver(fields, 'M_FARB', cache)
+    er_farb_display = exporter.display_resolver(fields, 'ER_FARB', cache)
+    
+    def m_farbe(qgis_feature):
+        # Use M_FARB, but if Sonstige use M_FARB_SON
+        value = m_farb_display(qgis_feature)
+        return qgis_feature.attribute(m_farb_son_idx) if _is_son(value) else value
+    
+    def er_farbe(qgis_feature):
+        # Use ER_FARB, but if Sonstige use ER_FARB_SON
+        value = er_farb_display(qgis_feature)
+        return qgis_feature.attribute(er_farb_son_idx) if _is_son(value) else value
+    
+    def farbe_resolver(typ_value):
+        typ_str = str(typ_value).lower()
+        if 'schutzrohr' in typ_str or 'rohrverband' in typ_str:
+            return m_farbe
+        if 'einzelrohr' in typ_str:
+            return er_farbe
+        return None
+    
+    # Raw TYP value → LR_FARBE resolver (None without colour rule). Value relation
+    # keys are classified up front by their display value, so features never resolve
+    # TYP to its display value; other values are their own display value
+    farbe_by_typ = {
+        typ_key: farbe_resolver(typ_display) if typ_display else None
+        for typ_key, typ_display in cache.get('TYP', {}).items()
+    }
+    to_ogr_value = exporter.to_ogr_value
+    
+    def post_transform(ogr_feature, qgis_feature):
+        # Calculate LR_FARBE based on TYP
+        typ_value = to_ogr_value(qgis_feature.attribute(typ_idx))
+        lr_farbe_value = None
+        if typ_value is not None:
+            if typ_value not in farbe_by_typ:
+                farbe_by_typ[typ_value] = farbe_resolver(typ_value) if typ_value else None
+            resolve_farbe = farbe_by_typ[typ_value]
+            if resolve_farbe is not None:
+                lr_farbe_value = resolve_farbe(qgis_feature)
+        
+        # Special logic for LR_HERST - if Sonstige, use LR_HER_SON
+        if lr_herst_idx >= 0 and ogr_feature.GetField(lr_herst_idx) in SONSTIGE_VALUES:
+            ogr_feature.SetField(lr_herst_idx, exporter.to_ogr_value(qgis_feature.attribute(lr_her_son_idx)))
+        
+        # Set LR_FARBE
+        lr_farbe_value = exporter.to_ogr_value(lr_farbe_value)
+        if lr_farbe_value and lr_farbe_idx >= 0:
+            ogr_feature.SetField(lr_farbe_idx, lr_farbe_value)
+    
+    return post_transform
+
+
+def _verbindungen_rules(exporter, layer_defn, fields, cache):
+    """Verbindungen: ART='Sonstige' uses V_A_SONST, LR_FARBE from ER_FARB/ER_FARB_SON"""
+    art_idx = layer_defn.GetFieldIndex('ART')
+    v_a_sonst_idx = fields.indexFromName('V_A_SONST')
+    er_farb_son_idx = fields.indexFromName('ER_FARB_SON')
+    lr_farbe_idx = layer_defn.GetFieldIndex('LR_FARBE')
+    er_farb_display = exporter.display_resolver(fields, 'ER_FARB', cache)
+    
+    def post_transform(ogr_feature, qgis_feature):
+        # Special logic for ART (VERB_ART) - if Sonstige use V_A_SONST
+        if art_idx >= 0 and ogr_feature.GetField(art_idx) in SONSTIGE_VALUES:
+            ogr_feature.SetField(art_idx, exporter.to_ogr_value(qgis_feature.attribute(v_a_sonst_idx)))
+        
+        # Special logic for LR_FARBE - use ER_FARB, if Sonstige use ER_FARB_SON
+        if lr_farbe_idx >= 0:
+            lr_farbe_value = er_farb_display(qgis_feature)
+            if _is_son(lr_farbe_value):
+                lr_farbe_value = qgis_feature.attribute(er_farb_son_idx)
+            lr_farbe_value = exporter.to_ogr_value(lr_farbe_value)
+            if lr_farbe_value:
+                ogr_feature.SetField(lr_farbe_idx, lr_farbe_value)
+    
+    return post_transform
+
+
+# Number of features written to the geodatabase per transaction
+GDB_TRANSACTION_SIZE = 100000
+
+# QGIS field types whose attribute values OGR accepts as they are (int, float, str),
+# only NULL is skipped - values of other types go through to_ogr_value
+OGR_DIRECT_FIELD_TYPES = frozenset((
+    QVariant.Int,
+    QVariant.UInt,
+    QVariant.LongLong,
+    QVariant.ULongLong,
+    QVariant.Double,
+    QVariant.String,
+))
+
+# GDB export definitions: QGIS layer (exact name or name keyword), field mapping as
+# (QGIS field, GDB field) pairs, target feature class, extra source fields and layer
+# specific post transform (function building a per-feature transform once the GDB fields are known)
+GDB_EXPORT_SPECS = {
+    'PUNKT': {
+        'layer': 'PUNKT',
+        'mapping': PUNKT_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': [],
+        'post': None,
+    },
+    'ROHRMUFFE': {
+        'layer': 'ROHRMUFFE',
+        'mapping': ROHRMUFFE_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': [],
+        'post': None,
+    },
+    'MESSPUNKT': {
+        'layer': 'MESSPUNKT',
+        'mapping': MESSPUNKT_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': [],
+        'post': None,
+    },
+    'BAUTEN': {
+        'layer': 'BAUTEN',
+        'mapping': BAUTEN_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': ['ART_SONST'],
+        'post': _art_sonst_rule,
+    },
+    'NETZTECHNIK': {
+        'layer': 'NETZTECHNIK',
+        'mapping': NETZTECHNIK_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': ['ART_SONST'],
+        'post': _art_sonst_rule,
+    },
+    'ENDVERBRAUCHER': {
+        'layer': 'ENDVERBRAUCHER',
+        'mapping': ENDVERBRAUCHER_TO_COM_DOKU_PUNKT_ITEMS,
+        'fc': 'punkt',
+        'extra_fields': [],
+        'post': None,
+    },
+    'Leerrohre': {
+        'keyword': 'leerrohr',
+        'mapping': LEERROHRE_TO_COM_DOKU_ROHR_ITEMS,
+        'fc': 'rohr',
+        'extra_fields': ['M_FARB', 'M_FARB_SON', 'ER_FARB', 'ER_FARB_SON', 'LR_HER_SON'],
+        'post': _leerrohre_rules,
+    },
+    'Verbindungen': {
+        'keyword': 'verbindung',
+        'mapping': VERBINDUNGEN_TO_COM_DOKU_KABEL_ITEMS,
+        'fc': 'kabel',
+        'extra_fields': ['V_A_SONST', 'ER_FARB', 'ER_FARB_SON'],
+        'post': _verbindungen_rules,
+    },
+}
+
+
+def typed_lookup(field, pairs, convert_key=None):
+    """Build {key: display value} from (key, value) pairs with keys converted to the type of field
+    
+    Keys then match the attribute values of the field directly, no str() fallback
+    per lookup. NULL keys (unhashable QVariant) and keys not convertible are dropped.
+    convert_key is applied to each converted key (e.g. the GDB value conversion).
+    """
+    lookup = {}
+    for key, value in pairs:
+        if key is None or isinstance(key, QVariant):
+            continue
+        try:
+            key = field.convertCompatible(key)
+        except ValueError:
+            continue
+        if convert_key is not None:
+            key = convert_key(key)
+        if key is not None and not isinstance(key, QVariant):
+            lookup[key] = value
+    return lookup
+
+
+def _same_geometry_type(wkb_type, ogr_geom_type):
+    """True if a QGIS layer geometry type equals an OGR geometry type (single/multi, Z and M)"""
+    return (
+        int(QgsWkbTypes.flatType(wkb_type)) == ogr.GT_Flatten(ogr_geom_type)
+        and QgsWkbTypes.hasZ(wkb_type) == bool(ogr.GT_HasZ(ogr_geom_type))
+        and QgsWkbTypes.hasM(wkb_type) == bool(ogr.GT_HasM(ogr_geom_type))
+    )
+
+
+def find_project_layer(name=None, keyword=None, id_cache=None):
+    """Find project layer by exact (case-insensitive) name or by name keyword
+    
+    The first matching layer in project order wins. With id_cache (a dict) the
+    layer id is cached per (name, keyword); the project is only scanned again
+    if that layer was removed or renamed.
+    """
+    def matches(layer):
+        if keyword:
+            return keyword in layer.name().lower()
+        return layer.name().upper() == name.upper()
+    
+    project = QgsProject.instance()
+    cache_key = (name, keyword)
+    if id_cache is not None:
+        layer = project.mapLayer(id_cache.get(cache_key, ''))
+        if layer is not None and matches(layer):
+            return layer
+    for layer_id, layer in project.mapLayers().items():
+        if matches(layer):
+            if id_cache is not None:
+                id_cache[cache_key] = layer_id
+            return layer
+    return None
+
+
 class GDBExporter:
     """Handles export to ArcGIS File Geodatabase"""
     
@@ -29,6 +285,14 @@ class GDBExporter:
         self.plugin_dir = plugin_dir
         self.template_gdb_path = os.path.join(plugin_dir, TEMPLATE_GDB_NAME)
         self.lookup_cache = {}
+        self.layer_id_cache = {}
+        self.fc_crs_cache = {}
+        # Update handles by geodatabase path - one writer per geodatabase
+        self.gdb_handles = {}
+        # Feature classes opened through each handle, synced once on close
+        self.gdb_layers = {}
+        # (feature class, QGIS field, GDB field) of mappings already logged as skipped
+        self.skipped_mappings = set()
     
     def copy_template_gdb(self, output_folder, job_id):
         """Copy template geodatabase to output folder with job-specific name"""
@@ -39,15 +303,23 @@ class GDBExporter:
         if os.path.exists(output_gdb_path):
             shutil.rmtree(output_gdb_path)
         
-        # Copy template
-        shutil.copytree(self.template_gdb_path, output_gdb_path)
+        # Copy template - plain file copies (no hardlinks, OpenFileGDB updates
+        # the copied tables in place), skipping metadata and stale lock files
+        shutil.copytree(
+            self.template_gdb_path,
+            output_gdb_path,
+            copy_function=shutil.copyfile,
+            ignore=shutil.ignore_patterns('*.lock')
+        )
         
         return output_gdb_path
     
-    def build_lookup_cache(self, layer):
-        """Build lookup cache for ValueRelation fields"""
+    def build_lookup_cache(self, layer, field_names=None):
+        """Build lookup cache for ValueRelation fields (only those in field_names, if given)"""
         cache = {}
         for field in layer.fields():
+            if field_names is not None and field.name() not in field_names:
+                continue
             field_idx = layer.fields().indexFromName(field.name())
             widget_setup = layer.editorWidgetSetup(field_idx)
             if widget_setup.type() == 'ValueRelation':
@@ -56,689 +328,493 @@ class GDBExporter:
                 key_field = config.get('Key')
                 value_field = config.get('Value')
                 
-                # Find related layer
+                # Find related layer (config stores layer id, older projects the name)
+                project = QgsProject.instance()
                 related_layer = None
-                for lyr in QgsProject.instance().mapLayers().values():
-                    if lyr.id() == related_layer_name or lyr.name() == related_layer_name:
-                        related_layer = lyr
-                        break
+                if related_layer_name:
+                    related_layer = (
+                        project.mapLayer(related_layer_name)
+                        or next(iter(project.mapLayersByName(related_layer_name)), None)
+                    )
                 
                 if related_layer:
-                    lookup = {}
-                    for feat in related_layer.getFeatures():
-                        key = feat[key_field]
-                        value = feat[value_field]
-                        lookup[str(key)] = value
-                    cache[field.name()] = lookup
+                    # Related layers are shared between exports - scan each one only once
+                    lookup_key = (related_layer.id(), key_field, value_field)
+                    pairs = self.lookup_cache.get(lookup_key)
+                    if pairs is None:
+                        lookup_request = QgsFeatureRequest()
+                        lookup_request.setSubsetOfAttributes([key_field, value_field], related_layer.fields())
+                        lookup_request.setFlags(QgsFeatureRequest.NoGeometry)
+                        pairs = [
+                            (feat[key_field], self.to_ogr_value(feat[value_field]))
+                            for feat in related_layer.getFeatures(lookup_request)
+                        ]
+                        self.lookup_cache[lookup_key] = pairs
+                    cache[field.name()] = typed_lookup(field, pairs, self.to_ogr_value)
         return cache
     
-    def get_display_value(self, feature, field_name, cache):
-        """Get display value for a field using cache"""
-        raw_value = feature[field_name]
-        if field_name in cache and raw_value is not None:
-            return cache[field_name].get(str(raw_value), raw_value)
-        return raw_value
+    def display_resolver(self, fields, field_name, cache):
+        """Build a function returning the display value of field_name for a feature (None for NULL)"""
+        field_idx = fields.indexFromName(field_name)
+        lookup = cache.get(field_name)
+        to_ogr_value = self.to_ogr_value
+        if lookup is None:
+            return lambda feature: to_ogr_value(feature.attribute(field_idx))
+        
+        def resolve(feature):
+            value = to_ogr_value(feature.attribute(field_idx))
+            return lookup.get(value, value) if value is not None else None
+        return resolve
     
-    def export_punkt_to_gdb(self, job_id, gdb_path):
-        """Export PUNKT layer to COM_DOKU_PUNKT feature class in geodatabase"""
+    def job_request(self, job_id):
+        """Build feature request filtered by job_id (value is quoted by QGIS)"""
+        return QgsFeatureRequest().setFilterExpression(
+            QgsExpression.createFieldEqualityExpression('job_id', job_id)
+        )
+    
+    def build_field_plan(self, fields, layer_defn, mapping, cache):
+        """Resolve mapping to (source index, GDB field index, lookup) tuples once per export
+        
+        Mappings whose source or GDB field doesn't exist are dropped and logged,
+        once per exporter - several exports share a feature class and its mapping.
+        """
+        field_plan = []
+        for qgis_field_name, gdb_field_name in mapping:
+            src_idx = fields.indexFromName(qgis_field_name)
+            dst_idx = layer_defn.GetFieldIndex(gdb_field_name)
+            if src_idx < 0 or dst_idx < 0:
+                skipped = (layer_defn.GetName(), qgis_field_name, gdb_field_name)
+                if skipped not in self.skipped_mappings:
+                    self.skipped_mappings.add(skipped)
+                    QgsMessageLog.logMessage(
+                        f'Skipping mapping {qgis_field_name} → {layer_defn.GetName()}.{gdb_field_name}: field not found',
+                        'netcom_bw_export',
+                        Qgis.Warning
+                    )
+                continue
+            field_plan.append((src_idx, dst_idx, cache.get(qgis_field_name)))
+        return field_plan
+    
+    def feature_class_crs(self, gdb_path, fc_name):
+        """CRS of a geodatabase feature class (invalid CRS if it has none), read once per feature class"""
+        cache_key = (gdb_path, fc_name)
+        if cache_key not in self.fc_crs_cache:
+            crs = QgsCoordinateReferenceSystem()
+            gdb_ds = gdal.OpenEx(gdb_path, gdal.OF_VECTOR, allowed_drivers=['OpenFileGDB'])
+            gdb_layer = gdb_ds.GetLayerByName(fc_name) if gdb_ds is not None else None
+            srs = gdb_layer.GetSpatialRef() if gdb_layer is not None else None
+            if srs is not None:
+                crs = QgsCoordinateReferenceSystem.fromWkt(srs.ExportToWkt())
+            self.fc_crs_cache[cache_key] = crs
+        return self.fc_crs_cache[cache_key]
+    
+    def open_gdb_layer(self, gdb_path, fc_name):
+        """Return (dataset, feature class layer) of the geodatabase opened for update
+        
+        The geodatabase is opened once, on first use, and the handle is shared by
+        all exports until close_gdb - OpenFileGDB has no multi-writer support.
+        """
+        gdb_ds = self.gdb_handles.get(gdb_path)
+        if gdb_ds is None:
+            gdb_ds = gdal.OpenEx(gdb_path, gdal.OF_VECTOR | gdal.OF_UPDATE, allowed_drivers=['OpenFileGDB'])
+            if gdb_ds is None:
+                return None, None
+            self.gdb_handles[gdb_path] = gdb_ds
+        gdb_layer = gdb_ds.GetLayerByName(fc_name)
+        if gdb_layer is not None:
+            self.gdb_layers.setdefault(gdb_path, {})[fc_name] = gdb_layer
+        return gdb_ds, gdb_layer
+    
+    def close_gdb(self, gdb_path):
+        """Close the update handle of the geodatabase (if open), writing pending changes
+        
+        Every feature class opened through the handle is synced once here -
+        OpenFileGDB rebuilds the spatial index it deferred while appending. Returns
+        the sync errors as {feature class name: error message}.
+        """
+        gdb_ds = self.gdb_handles.pop(gdb_path, None)
+        gdb_layers = self.gdb_layers.pop(gdb_path, {})
+        sync_errors = {}
+        if gdb_ds is None:
+            return sync_errors
+        for fc_name, gdb_layer in gdb_layers.items():
+            if gdb_layer.SyncToDisk() != ogr.OGRERR_NONE:
+                sync_errors[fc_name] = gdal.GetLastErrorMsg()
+        gdb_ds.FlushCache()
+        return sync_errors
+    
+    def report_sync_errors(self, exports, results, sync_errors):
+        """Mark the successful results of exports whose feature class failed to sync as failed"""
+        for i, (export, result) in enumerate(zip(exports, results)):
+            sync_error = sync_errors.get(GDB_FEATURE_CLASSES[export['spec']['fc']])
+            if sync_error is not None and result['success']:
+                results[i] = {'layer': result['layer'], 'success': False, 'error': f'Write error: {sync_error}'}
+        return results
+    
+    def ogr_source(self, layer):
+        """Return (path, layer name) if GDAL can read the layer directly, else None
+        
+        Only unfiltered layers of the OGR provider qualify - database layers and
+        layers with a subset string are read through QGIS.
+        """
+        if layer.providerType() != 'ogr' or layer.subsetString():
+            return None
+        parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+        path = parts.get('path')
+        if not path:
+            return None
+        return path, parts.get('layerName') or os.path.splitext(os.path.basename(path))[0]
+    
+    def to_ogr_geometry(self, geometry, geom_type):
+        """Convert QGIS geometry to OGR geometry of the feature class type"""
+        if geometry.isNull():
+            return None
+        # Single points into a 2D point class: build directly, no WKB round trip
+        if geom_type == ogr.wkbPoint and geometry.type() == QgsWkbTypes.PointGeometry and not geometry.isMultipart():
+            point = geometry.asPoint()
+            ogr_geometry = ogr.Geometry(ogr.wkbPoint)
+            ogr_geometry.AddPoint_2D(point.x(), point.y())
+            return ogr_geometry
+        ogr_geometry = ogr.CreateGeometryFromWkb(bytes(geometry.asWkb()))
+        return ogr.ForceTo(ogr_geometry, geom_type)
+    
+    def to_ogr_value(self, value):
+        """Convert QGIS attribute value to a value accepted by OGR (None for NULL)"""
+        if isinstance(value, QVariant):
+            return None
+        if isinstance(value, QDateTime):
+            return value.toString('yyyy/MM/dd hh:mm:ss')
+        if isinstance(value, QDate):
+            return value.toString('yyyy/MM/dd')
+        if isinstance(value, QTime):
+            return value.toString('hh:mm:ss')
+        if isinstance(value, bool):
+            return int(value)
+        return value
+    
+    def find_layer(self, spec):
+        """Find source layer of an export spec by exact (case-insensitive) name or name keyword"""
+        return find_project_layer(spec.get('layer'), spec.get('keyword'), self.layer_id_cache)
+    
+    def prepare_export(self, name, job_id):
+        """Collect everything needed to write one export (must run on the main thread)
+        
+        Returns None if the source layer is not in the project. The returned
+        feature source can be read from a worker thread.
+        """
+        spec = GDB_EXPORT_SPECS[name]
+        target_layer = self.find_layer(spec)
+        if not target_layer or not target_layer.isValid():
+            return None
+        
+        # Get features filtered by job_id
+        # Only mapped and rule fields are read - neither fetched nor looked up otherwise
+        needed_fields = [qgis_field_name for qgis_field_name, gdb_field_name in spec['mapping']] + spec['extra_fields']
+        request = self.job_request(job_id)
+        request.setSubsetOfAttributes(needed_fields, target_layer.fields())
+        
+        cache = self.build_lookup_cache(target_layer, set(needed_fields))
+        # Plain 1:1 copies (no value relation, no post transform) of file based
+        # layers are handed to GDAL as a whole - unless the layer has unsaved edits,
+        # GDAL only sees the file on disk
+        needs_python_transform = spec['post'] is not None or any(
+            qgis_field_name in cache for qgis_field_name, gdb_field_name in spec['mapping']
+        )
+        needs_python_transform = needs_python_transform or target_layer.isEditable() or target_layer.isModified()
+        # GDAL only sees the provider's columns - virtual (expression) and joined
+        # fields, mapped or filtered on, are computed by QGIS
+        fields = target_layer.fields()
+        field_indices = [fields.indexFromName(field_name) for field_name in needed_fields + ['job_id']]
+        needs_python_transform = needs_python_transform or any(
+            fields.fieldOrigin(field_idx) != QgsFields.OriginProvider for field_idx in field_indices if field_idx >= 0
+        )
+        
+        return {
+            'name': name,
+            'spec': spec,
+            'source': QgsVectorLayerFeatureSource(target_layer),
+            'fields': fields,
+            'cache': cache,
+            'request': request,
+            'crs': target_layer.crs(),
+            'wkb_type': target_layer.wkbType(),
+            'transform_context': QgsProject.instance().transformContext(),
+            'ogr_source': None if needs_python_transform else self.ogr_source(target_layer),
+        }
+    
+    def export_layer_to_gdb(self, name, job_id, gdb_path):
+        """Export QGIS layer to its GDB feature class as described in GDB_EXPORT_SPECS"""
         try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext
-            from qgis.PyQt.QtCore import QVariant
-            
-            # Find PUNKT layer in QGIS
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'PUNKT':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'PUNKT→GDB', 'success': False, 'error': 'PUNKT layer not found'}
-            
-            # Build lookup cache for display values
-            cache = self.build_lookup_cache(target_layer)
-            
-            # Create a temporary memory layer with mapped field names
-            fc_name = GDB_FEATURE_CLASSES['punkt']
-            
-            # Build fields for the output layer (using GDB field names)
-            from qgis.core import QgsFields
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in PUNKT_TO_COM_DOKU_PUNKT.items():
-                # Find original field to get its type
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    # Check if it's a ValueRelation - make it string
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            # Create memory layer
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_punkt_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            # Get features filtered by job_id
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                # Map fields with display values
-                for qgis_field_name, gdb_field_name in PUNKT_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            # Write to geodatabase using append mode
-            output_path = f"{gdb_path}|layername={fc_name}"
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(
-                mem_layer,
-                gdb_path,
-                QgsCoordinateTransformContext(),
-                options
-            )
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {
-                    'layer': 'PUNKT→GDB',
-                    'count': feature_count,
-                    'file': f'{gdb_path}\\{fc_name}',
-                    'success': True
-                }
-            else:
-                return {'layer': 'PUNKT→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
+            export = self.prepare_export(name, job_id)
         except Exception as e:
-            return {'layer': 'PUNKT→GDB', 'success': False, 'error': str(e)}
+            return {'layer': f'{name}→GDB', 'success': False, 'error': str(e)}
+        if export is None:
+            return {'layer': f'{name}→GDB', 'success': False, 'error': f'{name} layer not found'}
+        results = []
+        try:
+            results.append(self.write_export(export, gdb_path))
+        finally:
+            sync_errors = self.close_gdb(gdb_path)
+        return self.report_sync_errors([export], results, sync_errors)[0]
     
-    def export_rohrmuffe_to_gdb(self, job_id, gdb_path):
-        """Export ROHRMUFFE layer to COM_DOKU_PUNKT feature class in geodatabase"""
+    def export_all_to_gdb(self, job_id, gdb_path):
+        """Export all layers in GDB_EXPORT_SPECS"""
+        return self.start_export_all_to_gdb(job_id, gdb_path)()
+    
+    def start_export_all_to_gdb(self, job_id, gdb_path):
+        """Prepare all exports (main thread) and start writing them in a background thread
+        
+        All exports are written one after another through a single update handle
+        on the geodatabase, so the caller can do other work meanwhile. Returns a
+        function that waits for the writer and returns the results in
+        GDB_EXPORT_SPECS order.
+        """
+        results = {}
+        exports = []
+        for name in GDB_EXPORT_SPECS:
+            try:
+                export = self.prepare_export(name, job_id)
+            except Exception as e:
+                results[name] = {'layer': f'{name}→GDB', 'success': False, 'error': str(e)}
+                continue
+            if export is None:
+                results[name] = {'layer': f'{name}→GDB', 'success': False, 'error': f'{name} layer not found'}
+                continue
+            exports.append(export)
+        
+        def write_all():
+            written = []
+            try:
+                for export in exports:
+                    written.append(self.write_export(export, gdb_path))
+            finally:
+                # Syncs each written feature class once, in this thread
+                sync_errors = self.close_gdb(gdb_path)
+            return self.report_sync_errors(exports, written, sync_errors)
+        
+        pool = ThreadPoolExecutor(max_workers=1)
+        future = pool.submit(write_all)
+        
+        def collect_results():
+            try:
+                for export, result in zip(exports, future.result()):
+                    results[export['name']] = result
+            finally:
+                pool.shutdown()
+            return [results[name] for name in GDB_EXPORT_SPECS]
+        
+        return collect_results
+    
+    def write_export(self, export, gdb_path):
+        """Write features of a prepared export to the geodatabase (from one thread at a time)"""
+        spec = export['spec']
+        cache = export['cache']
+        label = f"{export['name']}→GDB"
         try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            # Find ROHRMUFFE layer in QGIS
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'ROHRMUFFE':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'ROHRMUFFE→GDB', 'success': False, 'error': 'ROHRMUFFE layer not found'}
-            
-            # Build lookup cache for display values
-            cache = self.build_lookup_cache(target_layer)
-            
-            fc_name = GDB_FEATURE_CLASSES['punkt']  # Goes to COM_DOKU_PUNKT
-            
-            # Build fields for the output layer (using GDB field names)
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in ROHRMUFFE_TO_COM_DOKU_PUNKT.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            # Create memory layer
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_rohrmuffe_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            # Get features filtered by job_id
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
+            fc_name = GDB_FEATURE_CLASSES[spec['fc']]
+            destination_crs = self.feature_class_crs(gdb_path, fc_name)
+            # GDAL copies coordinates as they are - exports needing reprojection go
+            # through the feature iterator below, like all other reprojected exports
+            same_crs = not destination_crs.isValid() or destination_crs == export['crs']
+            if export['ogr_source'] and same_crs:
+                # Same as below - jobs without features in this layer don't open the geodatabase
+                probe_request = QgsFeatureRequest(export['request'])
+                probe_request.setFlags(QgsFeatureRequest.NoGeometry)
+                probe_request.setNoAttributes()
+                probe_request.setLimit(1)
+                if not any(True for _ in export['source'].getFeatures(probe_request)):
+                    return {'layer': label, 'count': 0, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
+                gdb_ds, gdb_layer = self.open_gdb_layer(gdb_path, fc_name)
+                if gdb_layer is None:
+                    return {'layer': label, 'success': False, 'error': f'{fc_name} not found in {gdb_path}'}
+                # GDAL doesn't convert single/multi part or Z/M either - differing
+                # geometry types are converted by to_ogr_geometry below
+                if _same_geometry_type(export['wkb_type'], gdb_layer.GetGeomType()):
+                    field_plan = self.build_field_plan(export['fields'], gdb_layer.GetLayerDefn(), spec['mapping'], cache)
+                    return self.copy_export(export, gdb_path, fc_name, field_plan)
+            
+            # Fetch first feature before touching the geodatabase - jobs without
+            # features in this layer don't open the feature class for update at all
+            request = QgsFeatureRequest(export['request'])
+            if destination_crs.isValid():
+                # Reprojected by the feature iterator (transform set up once) if the CRS differs
+                request.setDestinationCrs(destination_crs, export['transform_context'])
+            features = export['source'].getFeatures(request)
+            first_feature = QgsFeature()
+            if not features.nextFeature(first_feature):
+                return {'layer': label, 'count': 0, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
+            
+            # Open target feature class directly - features are written with OGR
+            gdb_ds, gdb_layer = self.open_gdb_layer(gdb_path, fc_name)
+            if gdb_layer is None:
+                return {'layer': label, 'success': False, 'error': f'{fc_name} not found in {gdb_path}'}
+            layer_defn = gdb_layer.GetLayerDefn()
+            geom_type = gdb_layer.GetGeomType()
+            
+            fields = export['fields']
+            field_plan = self.build_field_plan(fields, layer_defn, spec['mapping'], cache)
+            # Plain copies and value relation columns are mapped in separate passes,
+            # so plain columns don't test for a lookup on every feature. Plain copies
+            # are converted only if the field type needs it (dates, booleans, ...)
+            direct_plan = [
+                (src_idx, dst_idx) for src_idx, dst_idx, lookup in field_plan
+                if lookup is None and fields.at(src_idx).type() in OGR_DIRECT_FIELD_TYPES
+            ]
+            convert_plan = [
+                (src_idx, dst_idx) for src_idx, dst_idx, lookup in field_plan
+                if lookup is None and fields.at(src_idx).type() not in OGR_DIRECT_FIELD_TYPES
+            ]
+            lookup_plan = [plan for plan in field_plan if plan[2] is not None]
+            post_transform = spec['post'](self, layer_defn, fields, cache) if spec['post'] else None
             feature_count = 0
             
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                for qgis_field_name, gdb_field_name in ROHRMUFFE_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
+            # Bound once - looked up for every feature otherwise
+            to_ogr_value = self.to_ogr_value
+            to_ogr_geometry = self.to_ogr_geometry
+            create_feature = gdb_layer.CreateFeature
+            new_feature = ogr.Feature
+            
+            # Layer level transactions are no-ops on OpenFileGDB - use the emulated
+            # dataset transaction (the driver backs up the tables it changes), committed
+            # every GDB_TRANSACTION_SIZE features. A failed write rolls back the
+            # uncommitted features only
+            in_transaction = gdb_ds.StartTransaction(force=True) == ogr.OGRERR_NONE
+            committed_count = 0
+            try:
+                for qgis_feature in chain([first_feature], features):
+                    ogr_feature = new_feature(layer_defn)
+                    ogr_geometry = to_ogr_geometry(qgis_feature.geometry(), geom_type)
+                    if ogr_geometry is not None:
+                        ogr_feature.SetGeometryDirectly(ogr_geometry)
+                    
+                    # Map fields with display values
+                    attributes = qgis_feature.attributes()
+                    for src_idx, dst_idx in direct_plan:
+                        value = attributes[src_idx]
+                        if value is not None and not isinstance(value, QVariant):
+                            ogr_feature.SetField(dst_idx, value)
+                    for src_idx, dst_idx in convert_plan:
+                        value = to_ogr_value(attributes[src_idx])
                         if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            # Write to geodatabase using append mode
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(
-                mem_layer,
-                gdb_path,
-                QgsCoordinateTransformContext(),
-                options
-            )
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {
-                    'layer': 'ROHRMUFFE→GDB',
-                    'count': feature_count,
-                    'file': f'{gdb_path}\\{fc_name}',
-                    'success': True
-                }
-            else:
-                return {'layer': 'ROHRMUFFE→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
+                            ogr_feature.SetField(dst_idx, value)
+                    for src_idx, dst_idx, lookup in lookup_plan:
+                        value = to_ogr_value(attributes[src_idx])
+                        if value is not None:
+                            ogr_feature.SetField(dst_idx, lookup.get(value, value))
+                    
+                    # Layer specific rules (ART_SONST, LR_FARBE, ...)
+                    if post_transform:
+                        post_transform(ogr_feature, qgis_feature)
+                    
+                    if create_feature(ogr_feature) != ogr.OGRERR_NONE:
+                        error = f'Write error: {gdal.GetLastErrorMsg()}'
+                        if in_transaction:
+                            gdb_ds.RollbackTransaction()
+                        else:
+                            committed_count = feature_count
+                        if committed_count:
+                            error += f' ({committed_count} features already written)'
+                        return {'layer': label, 'success': False, 'error': error}
+                    feature_count += 1
+                    if in_transaction and feature_count % GDB_TRANSACTION_SIZE == 0:
+                        if gdb_ds.CommitTransaction() != ogr.OGRERR_NONE:
+                            return {'layer': label, 'success': False, 'error': f'Write error: {gdal.GetLastErrorMsg()}'}
+                        committed_count = feature_count
+                        in_transaction = gdb_ds.StartTransaction(force=True) == ogr.OGRERR_NONE
+            except Exception:
+                # Don't leave the shared handle inside the failed export's transaction
+                if in_transaction:
+                    gdb_ds.RollbackTransaction()
+                raise
+            
+            if in_transaction and gdb_ds.CommitTransaction() != ogr.OGRERR_NONE:
+                return {'layer': label, 'success': False, 'error': f'Write error: {gdal.GetLastErrorMsg()}'}
+            
+            return {'layer': label, 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
             
         except Exception as e:
-            return {'layer': 'ROHRMUFFE→GDB', 'success': False, 'error': str(e)}
+            return {'layer': label, 'success': False, 'error': str(e)}
+    
+    def copy_export(self, export, gdb_path, fc_name, field_plan):
+        """Append a pass-through export with GDAL (ogr2ogr -append), no per-feature Python
+        
+        field_plan is the export's plan from build_field_plan, built by write_export.
+        """
+        label = f"{export['name']}→GDB"
+        src_path, src_layer_name = export['ogr_source']
+        
+        gdb_ds, gdb_layer = self.open_gdb_layer(gdb_path, fc_name)
+        if gdb_layer is None:
+            return {'layer': label, 'success': False, 'error': f'{fc_name} not found in {gdb_path}'}
+        
+        # Select only mapped fields present on both sides, renamed to the GDB names
+        layer_defn = gdb_layer.GetLayerDefn()
+        select_list = ', '.join(
+            f'"{export["fields"].at(src_idx).name()}" AS "{layer_defn.GetFieldDefn(dst_idx).GetName()}"'
+            for src_idx, dst_idx, lookup in field_plan
+        )
+        # QGIS field equality expressions are valid OGR SQL
+        where = export['request'].filterExpression().expression()
+        sql = f'SELECT {select_list or "*"} FROM "{src_layer_name}" WHERE {where}'
+        
+        count_before = gdb_layer.GetFeatureCount()
+        # Same emulated dataset transaction as write_export - a failed append
+        # leaves no partly copied features behind
+        in_transaction = gdb_ds.StartTransaction(force=True) == ogr.OGRERR_NONE
+        try:
+            result = gdal.VectorTranslate(
+                gdb_ds,
+                src_path,
+                options=gdal.VectorTranslateOptions(
+                    accessMode='append',
+                    layerName=fc_name,
+                    SQLStatement=sql,
+                    SQLDialect='OGRSQL',
+                )
+            )
+        except Exception:
+            if in_transaction:
+                gdb_ds.RollbackTransaction()
+            raise
+        if result is None:
+            error = f'Write error: {gdal.GetLastErrorMsg()}'
+            if in_transaction:
+                gdb_ds.RollbackTransaction()
+            return {'layer': label, 'success': False, 'error': error}
+        if in_transaction and gdb_ds.CommitTransaction() != ogr.OGRERR_NONE:
+            return {'layer': label, 'success': False, 'error': f'Write error: {gdal.GetLastErrorMsg()}'}
+        
+        feature_count = gdb_layer.GetFeatureCount() - count_before
+        return {'layer': label, 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
+    
+    def export_punkt_to_gdb(self, job_id, gdb_path):
+        """Export PUNKT layer to COM_DOKU_PUNKT feature class in geodatabase"""
+        return self.export_layer_to_gdb('PUNKT', job_id, gdb_path)
+    
+    def export_rohrmuffe_to_gdb(self, job_id, gdb_path):
+        """Export ROHRMUFFE layer to COM_DOKU_PUNKT feature class in geodatabase"""
+        return self.export_layer_to_gdb('ROHRMUFFE', job_id, gdb_path)
     
     def export_messpunkt_to_gdb(self, job_id, gdb_path):
         """Export MESSPUNKT layer to COM_DOKU_PUNKT feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'MESSPUNKT':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'MESSPUNKT→GDB', 'success': False, 'error': 'MESSPUNKT layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['punkt']
-            
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in MESSPUNKT_TO_COM_DOKU_PUNKT.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_messpunkt_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                for qgis_field_name, gdb_field_name in MESSPUNKT_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'MESSPUNKT→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'MESSPUNKT→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'MESSPUNKT→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('MESSPUNKT', job_id, gdb_path)
     
     def export_bauten_to_gdb(self, job_id, gdb_path):
         """Export BAUTEN layer to COM_DOKU_PUNKT feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'BAUTEN':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'BAUTEN→GDB', 'success': False, 'error': 'BAUTEN layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['punkt']
-            
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in BAUTEN_TO_COM_DOKU_PUNKT.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_bauten_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                for qgis_field_name, gdb_field_name in BAUTEN_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                # Special logic: if ART='Sonstiges', use ART_SONST value
-                art_value = new_feature['ART']
-                if art_value and art_value in ('Sonstiges', 'Sonstige'):
-                    art_sonst = qgis_feature['ART_SONST']
-                    if art_sonst:
-                        new_feature['ART'] = art_sonst
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'BAUTEN→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'BAUTEN→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'BAUTEN→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('BAUTEN', job_id, gdb_path)
     
     def export_netztechnik_to_gdb(self, job_id, gdb_path):
         """Export NETZTECHNIK layer to COM_DOKU_PUNKT feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'NETZTECHNIK':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'NETZTECHNIK→GDB', 'success': False, 'error': 'NETZTECHNIK layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['punkt']
-            
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in NETZTECHNIK_TO_COM_DOKU_PUNKT.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_netztechnik_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                for qgis_field_name, gdb_field_name in NETZTECHNIK_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                # Special logic: if ART='Sonstige', use ART_SONST value
-                art_value = new_feature['ART']
-                if art_value and art_value in ('Sonstiges', 'Sonstige'):
-                    art_sonst = qgis_feature['ART_SONST']
-                    if art_sonst:
-                        new_feature['ART'] = art_sonst
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'NETZTECHNIK→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'NETZTECHNIK→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'NETZTECHNIK→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('NETZTECHNIK', job_id, gdb_path)
     
     def export_endverbraucher_to_gdb(self, job_id, gdb_path):
         """Export ENDVERBRAUCHER layer to COM_DOKU_PUNKT feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if layer.name().upper() == 'ENDVERBRAUCHER':
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'ENDVERBRAUCHER→GDB', 'success': False, 'error': 'ENDVERBRAUCHER layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['punkt']
-            
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in ENDVERBRAUCHER_TO_COM_DOKU_PUNKT.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            mem_layer = QgsVectorLayer(f"Point?crs={target_layer.crs().authid()}", "temp_endverbraucher_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                for qgis_field_name, gdb_field_name in ENDVERBRAUCHER_TO_COM_DOKU_PUNKT.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'ENDVERBRAUCHER→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'ENDVERBRAUCHER→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'ENDVERBRAUCHER→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('ENDVERBRAUCHER', job_id, gdb_path)
     
     def export_leerrohre_to_gdb(self, job_id, gdb_path):
         """Export Leerrohre layer to COM_DOKU_ROHR feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if 'leerrohr' in layer.name().lower():
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'Leerrohre→GDB', 'success': False, 'error': 'Leerrohre layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['rohr']
-            
-            # Build output fields
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in LEERROHRE_TO_COM_DOKU_ROHR.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            # Add LR_FARBE field (handled separately)
-            output_fields.append(QgsField('LR_FARBE', QVariant.String, 'String', 254))
-            
-            # Create memory layer (LineString)
-            mem_layer = QgsVectorLayer(f"LineString?crs={target_layer.crs().authid()}", "temp_leerrohre_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                # First calculate LR_FARBE based on TYP
-                typ_value = self.get_display_value(qgis_feature, 'TYP', cache)
-                lr_farbe_value = None
-                if typ_value:
-                    typ_str = str(typ_value).lower()
-                    if 'schutzrohr' in typ_str or 'rohrverband' in typ_str:
-                        # Use M_FARB, but if Sonstige use M_FARB_SON
-                        lr_farbe_value = self.get_display_value(qgis_feature, 'M_FARB', cache)
-                        if lr_farbe_value and str(lr_farbe_value) in ('Sonstige', 'Sonstiges'):
-                            lr_farbe_value = qgis_feature['M_FARB_SON']
-                    elif 'einzelrohr' in typ_str:
-                        # Use ER_FARB, but if Sonstige use ER_FARB_SON
-                        lr_farbe_value = self.get_display_value(qgis_feature, 'ER_FARB', cache)
-                        if lr_farbe_value and str(lr_farbe_value) in ('Sonstige', 'Sonstiges'):
-                            lr_farbe_value = qgis_feature['ER_FARB_SON']
-                
-                # Map regular fields
-                for qgis_field_name, gdb_field_name in LEERROHRE_TO_COM_DOKU_ROHR.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                # Special logic for LR_HERST - if Sonstige, use LR_HER_SON
-                lr_herst_value = new_feature['LR_HERST'] if 'LR_HERST' in [f.name() for f in mem_layer.fields()] else None
-                if lr_herst_value and str(lr_herst_value) in ('Sonstige', 'Sonstiges'):
-                    new_feature['LR_HERST'] = qgis_feature['LR_HER_SON']
-                
-                # Set LR_FARBE
-                if lr_farbe_value:
-                    new_feature['LR_FARBE'] = lr_farbe_value
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'Leerrohre→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'Leerrohre→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'Leerrohre→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('Leerrohre', job_id, gdb_path)
     
     def export_verbindungen_to_gdb(self, job_id, gdb_path):
         """Export Verbindungen layer to COM_DOKU_KABEL feature class in geodatabase"""
-        try:
-            from qgis.core import QgsVectorLayer, QgsFeature, QgsField, QgsVectorFileWriter, QgsCoordinateTransformContext, QgsFields
-            from qgis.PyQt.QtCore import QVariant
-            
-            target_layer = None
-            for layer in QgsProject.instance().mapLayers().values():
-                if 'verbindung' in layer.name().lower():
-                    target_layer = layer
-                    break
-            
-            if not target_layer or not target_layer.isValid():
-                return {'layer': 'Verbindungen→GDB', 'success': False, 'error': 'Verbindungen layer not found'}
-            
-            cache = self.build_lookup_cache(target_layer)
-            fc_name = GDB_FEATURE_CLASSES['kabel']
-            
-            # Build output fields
-            output_fields = QgsFields()
-            for qgis_field_name, gdb_field_name in VERBINDUNGEN_TO_COM_DOKU_KABEL.items():
-                original_field_idx = target_layer.fields().indexFromName(qgis_field_name)
-                if original_field_idx >= 0:
-                    original_field = target_layer.fields().field(original_field_idx)
-                    widget_setup = target_layer.editorWidgetSetup(original_field_idx)
-                    if widget_setup.type() == 'ValueRelation':
-                        new_field = QgsField(gdb_field_name, QVariant.String, 'String', 254)
-                    else:
-                        new_field = QgsField(gdb_field_name, original_field.type(), original_field.typeName(), original_field.length(), original_field.precision())
-                    output_fields.append(new_field)
-            
-            # Add LR_FARBE field (handled separately)
-            output_fields.append(QgsField('LR_FARBE', QVariant.String, 'String', 254))
-            
-            # Create memory layer (LineString)
-            mem_layer = QgsVectorLayer(f"LineString?crs={target_layer.crs().authid()}", "temp_verbindungen_gdb", "memory")
-            mem_layer.dataProvider().addAttributes(output_fields)
-            mem_layer.updateFields()
-            mem_layer.startEditing()
-            
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            feature_count = 0
-            
-            for qgis_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(mem_layer.fields())
-                new_feature.setGeometry(qgis_feature.geometry())
-                
-                # Map regular fields
-                for qgis_field_name, gdb_field_name in VERBINDUNGEN_TO_COM_DOKU_KABEL.items():
-                    try:
-                        value = self.get_display_value(qgis_feature, qgis_field_name, cache)
-                        if value is not None:
-                            new_feature[gdb_field_name] = value
-                    except:
-                        pass
-                
-                # Special logic for ART (VERB_ART) - if Sonstige use V_A_SONST
-                art_value = new_feature['ART'] if 'ART' in [f.name() for f in mem_layer.fields()] else None
-                if art_value and str(art_value) in ('Sonstige', 'Sonstiges'):
-                    new_feature['ART'] = qgis_feature['V_A_SONST']
-                
-                # Special logic for LR_FARBE - use ER_FARB, if Sonstige use ER_FARB_SON
-                lr_farbe_value = self.get_display_value(qgis_feature, 'ER_FARB', cache)
-                if lr_farbe_value and str(lr_farbe_value) in ('Sonstige', 'Sonstiges'):
-                    lr_farbe_value = qgis_feature['ER_FARB_SON']
-                if lr_farbe_value:
-                    new_feature['LR_FARBE'] = lr_farbe_value
-                
-                mem_layer.addFeature(new_feature)
-                feature_count += 1
-            
-            mem_layer.commitChanges()
-            
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'OpenFileGDB'
-            options.layerName = fc_name
-            options.actionOnExistingFile = QgsVectorFileWriter.AppendToLayerNoNewFields
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(mem_layer, gdb_path, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'Verbindungen→GDB', 'count': feature_count, 'file': f'{gdb_path}\\{fc_name}', 'success': True}
-            else:
-                return {'layer': 'Verbindungen→GDB', 'success': False, 'error': f'Write error: {error[1]}'}
-            
-        except Exception as e:
-            return {'layer': 'Verbindungen→GDB', 'success': False, 'error': str(e)}
+        return self.export_layer_to_gdb('Verbindungen', job_id, gdb_path)
@@ -3,6 +3,8 @@
 Field mappings between QGIS layers and ArcGIS Geodatabase feature classes
 """
 
+# Each mapping is also provided as a tuple of (QGIS field, GDB field) pairs (*_ITEMS)
+
 # Mapping: PUNKT (QGIS) → COM_DOKU_PUNKT (GDB)
 PUNKT_TO_COM_DOKU_PUNKT = {
     'id': 'ID',
@@ -18,6 +20,7 @@ PUNKT_TO_COM_DOKU_PUNKT = {
     'BEMERKUNG': 'BEMERKUNG',
     'GEBIET_ID': 'GEBIET_ID',
 }
+PUNKT_TO_COM_DOKU_PUNKT_ITEMS = tuple(PUNKT_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: ROHRMUFFE (QGIS) → COM_DOKU_PUNKT (GDB)
 ROHRMUFFE_TO_COM_DOKU_PUNKT = {
@@ -28,6 +31,7 @@ ROHRMUFFE_TO_COM_DOKU_PUNKT = {
     'KLASSE': 'KLASSE',
     'GEBIET_ID': 'GEBIET_ID',
 }
+ROHRMUFFE_TO_COM_DOKU_PUNKT_ITEMS = tuple(ROHRMUFFE_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: MESSPUNKT (QGIS) → COM_DOKU_PUNKT (GDB)
 MESSPUNKT_TO_COM_DOKU_PUNKT = {
@@ -40,9 +44,10 @@ MESSPUNKT_TO_COM_DOKU_PUNKT = {
     'DATUM_EINSPIELUNG': 'DATUM_EINSPIELUNG',
     'GEBIET_ID': 'GEBIET_ID',
 }
+MESSPUNKT_TO_COM_DOKU_PUNKT_ITEMS = tuple(MESSPUNKT_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: BAUTEN (QGIS) → COM_DOKU_PUNKT (GDB)
-# Note: ART has special logic - if ART='Sonstiges', use ART_SONST value
+# Note: ART has special logic - if ART='Sonstige' or 'Sonstiges', use ART_SONST value
 BAUTEN_TO_COM_DOKU_PUNKT = {
     'id': 'ID',
     'ART': 'ART',
@@ -61,9 +66,10 @@ BAUTEN_TO_COM_DOKU_PUNKT = {
     'Y_WGS': 'Y_COORD',
     'GEBIET_ID': 'GEBIET_ID',
 }
+BAUTEN_TO_COM_DOKU_PUNKT_ITEMS = tuple(BAUTEN_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: NETZTECHNIK (QGIS) → COM_DOKU_PUNKT (GDB)
-# Note: ART has special logic - if ART='Sonstige', use ART_SONST value
+# Note: ART has special logic - if ART='Sonstige' or 'Sonstiges', use ART_SONST value
 NETZTECHNIK_TO_COM_DOKU_PUNKT = {
     'id': 'ID',
     'ART': 'ART',
@@ -80,6 +86,7 @@ NETZTECHNIK_TO_COM_DOKU_PUNKT = {
     'KLASSE': 'KLASSE',
     'GEBIET_ID': 'GEBIET_ID',
 }
+NETZTECHNIK_TO_COM_DOKU_PUNKT_ITEMS = tuple(NETZTECHNIK_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: ENDVERBRAUCHER (QGIS) → COM_DOKU_PUNKT (GDB)
 ENDVERBRAUCHER_TO_COM_DOKU_PUNKT = {
@@ -88,6 +95,7 @@ ENDVERBRAUCHER_TO_COM_DOKU_PUNKT = {
     'KLASSE': 'KLASSE',
     'GEBIET_ID': 'GEBIET_ID',
 }
+ENDVERBRAUCHER_TO_COM_DOKU_PUNKT_ITEMS = tuple(ENDVERBRAUCHER_TO_COM_DOKU_PUNKT.items())
 
 # Mapping: Leerrohre (QGIS) → COM_DOKU_ROHR (GDB)
 # Note: LR_FARBE has special logic based on TYP value
@@ -113,6 +121,7 @@ LEERROHRE_TO_COM_DOKU_ROHR = {
     'GEBIET_ID': 'GEBIET_ID',
     'ROHR_ID': 'ROHR_ID',
 }
+LEERROHRE_TO_COM_DOKU_ROHR_ITEMS = tuple(LEERROHRE_TO_COM_DOKU_ROHR.items())
 
 # Mapping: Verbindungen (QGIS) → COM_DOKU_KABEL (GDB)
 # Note: LR_FARBE uses ER_FARB, but if Sonstige use ER_FARB_SON
@@ -136,6 +145,10 @@ VERBINDUNGEN_TO_COM_DOKU_KABEL = {
     'GEBIET_ID': 'GEBIET_ID',
     'KABEL_ID': 'KABEL_ID',
 }
+VERBINDUNGEN_TO_COM_DOKU_KABEL_ITEMS = tuple(VERBINDUNGEN_TO_COM_DOKU_KABEL.items())
+
+# Display values meaning "other" - the matching *_SONST field holds the actual value
+SONSTIGE_VALUES = frozenset(('Sonstige', 'Sonstiges'))
 
 # Template geodatabase name
 TEMPLATE_GDB_NAME = 'GIS_Nebenstimungen_501_geodatabase.gdb'
@@ -21,20 +21,38 @@
  *                                                                         *
  ***************************************************************************/
 """
-from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, QVariant
+from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication, QVariant, Qt
 from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QAction, QMessageBox
-from qgis.core import QgsProject, QgsVectorLayer, QgsVectorFileWriter, QgsFeature, QgsField, QgsWkbTypes, QgsFeatureRequest, QgsCoordinateTransformContext
+from qgis.PyQt.QtWidgets import QAction, QMessageBox, QProgressBar, QApplication
+from qgis.core import (
+    QgsProject,
+    QgsVectorFileWriter,
+    QgsFeature,
+    QgsField,
+    QgsFields,
+    QgsWkbTypes,
+    QgsFeatureRequest,
+    QgsFeatureSink,
+    QgsExpression,
+)
 import os
 import os.path
 import shutil
+import traceback
 
 # Initialize Qt resources from file resources.py
 from .resources import *
 # Import the code for the dialog
 from .netcom_bw_export_dialog import netcom_bw_exportDialog
 # Import GDB exporter
-from .export_gdb import GDBExporter
+from .export_gdb import GDBExporter, find_project_layer, typed_lookup
+from .field_mappings import SONSTIGE_VALUES
+
+# Output field builders by editor widget type - fields with other widgets are copied as is
+DISPLAY_FIELD_BUILDERS = {
+    # Exported with the display value instead of the key
+    'ValueRelation': lambda field: QgsField(field.name(), QVariant.String, 'String', 254),
+}
 
 
 class netcom_bw_export:
@@ -71,6 +89,12 @@ class netcom_bw_export:
         # Check if plugin was started the first time in current QGIS session
         # Must be set in initGui() to survive plugin reloads
         self.first_start = None
+        # Layer ids found by find_layer, keyed by (name, keyword)
+        self.layer_id_cache = {}
+        # Editor widget setups per layer id, cleared for every export run
+        self.widget_setup_cache = {}
+        # (job_id, filter expression) of the last export
+        self.job_filter_cache = None
 
     # noinspection PyMethodMayBeStatic
     def tr(self, message):
@@ -191,12 +215,7 @@ class netcom_bw_export:
         self.dlg.comboBox_job.clear()
         
         # Find the job layer
-        layers = QgsProject.instance().mapLayers()
-        job_layer = None
-        for layer_id, layer in layers.items():
-            if layer.name().lower() == 'job':
-                job_layer = layer
-                break
+        job_layer = self.find_layer(name='JOB')
         
         if not job_layer or not job_layer.isValid():
             self.dlg.comboBox_job.addItem("No job layer found", None)
@@ -227,9 +246,21 @@ class netcom_bw_export:
         result = self.dlg.exec_()
         # See if OK was pressed
         if result:
+            # Widget configuration may have changed since the last run
+            self.widget_setup_cache = {}
+            
             # Get the job_id value from the dialog
             job_id = self.dlg.get_job_id()
             
+            # A missing job_id would become an "IS NULL" filter and export all unassigned features
+            if job_id is None:
+                QMessageBox.warning(
+                    self.iface.mainWindow(),
+                    'Warning',
+                    'No job selected.'
+                )
+                return
+            
             # Get the selected output folder
             output_folder = self.dlg.get_output_folder()
             
@@ -260,10 +291,24 @@ class netcom_bw_export:
                 ('REL_DOKU_KABEL_ROHR', self.export_rel_doku_kabel_rohr_layer),
             ]
             
-            # Setup progress bar
-            from qgis.PyQt.QtWidgets import QProgressBar
-            from qgis.PyQt.QtCore import Qt
+            # === GEODATABASE EXPORT ===
+            # Started first - the feature classes are written in a background thread
+            # while the layers are exported below
+            gdb_exporter = GDBExporter(self.plugin_dir)
+            collect_gdb_results = None
+            gdb_error = None
+            try:
+                # Copy template geodatabase
+                gdb_path = gdb_exporter.copy_template_gdb(output_folder, job_id)
+                collect_gdb_results = gdb_exporter.start_export_all_to_gdb(job_id, gdb_path)
+            except Exception as e:
+                gdb_error = {
+                    'layer': 'GDB Export',
+                    'success': False,
+                    'error': str(e)
+                }
             
+            # Setup progress bar
             progressMessageBar = self.iface.messageBar().createMessage(f"Exporting layers for Job ID: {job_id}...")
             progress = QProgressBar()
             progress.setMaximum(len(layers_to_export))
@@ -276,7 +321,6 @@ class netcom_bw_export:
                 progress.setValue(i)
                 progressMessageBar.setText(f"Exporting {layer_name}...")
                 # Process events to update UI
-                from qgis.PyQt.QtWidgets import QApplication
                 QApplication.processEvents()
                 
                 result = export_func(job_id, output_folder)
@@ -287,59 +331,21 @@ class netcom_bw_export:
             progress.setValue(len(layers_to_export))
             self.iface.messageBar().clearWidgets()
             
-            # === GEODATABASE EXPORT ===
-            gdb_exporter = GDBExporter(self.plugin_dir)
-            
-            # Copy template geodatabase
+            # Wait for the geodatabase export
             try:
-                gdb_path = gdb_exporter.copy_template_gdb(output_folder, job_id)
-                
-                # Export PUNKT to geodatabase
-                gdb_result = gdb_exporter.export_punkt_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export ROHRMUFFE to geodatabase
-                gdb_result = gdb_exporter.export_rohrmuffe_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export MESSPUNKT to geodatabase
-                gdb_result = gdb_exporter.export_messpunkt_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export BAUTEN to geodatabase
-                gdb_result = gdb_exporter.export_bauten_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export NETZTECHNIK to geodatabase
-                gdb_result = gdb_exporter.export_netztechnik_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export ENDVERBRAUCHER to geodatabase
-                gdb_result = gdb_exporter.export_endverbraucher_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export Leerrohre to geodatabase (COM_DOKU_ROHR)
-                gdb_result = gdb_exporter.export_leerrohre_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
-                
-                # Export Verbindungen to geodatabase (COM_DOKU_KABEL)
-                gdb_result = gdb_exporter.export_verbindungen_to_gdb(job_id, gdb_path)
-                if gdb_result:
-                    export_results.append(gdb_result)
+                if collect_gdb_results:
+                    for gdb_result in collect_gdb_results():
+                        if gdb_result:
+                            export_results.append(gdb_result)
                     
             except Exception as e:
-                export_results.append({
+                gdb_error = {
                     'layer': 'GDB Export',
                     'success': False,
                     'error': str(e)
-                })
+                }
+            if gdb_error:
+                export_results.append(gdb_error)
             
             # Show final summary dialog
             self.show_export_summary(export_results, job_id)
@@ -348,71 +354,14 @@ class netcom_bw_export:
         """Export PUNKT layer features filtered by job_id with display values"""
         try:
             # Find the PUNKT layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'PUNKT':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='PUNKT')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'PUNKT', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_punkt", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'PUNKT_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('PUNKT', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'PUNKT', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'PUNKT', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'PUNKT', 'success': False, 'error': str(e)}
     
@@ -420,71 +369,14 @@ class netcom_bw_export:
         """Export ROHRMUFFE layer features filtered by job_id with display values"""
         try:
             # Find the ROHRMUFFE layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'ROHRMUFFE':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='ROHRMUFFE')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'ROHRMUFFE', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_rohrmuffe", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'ROHRMUFFE_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('ROHRMUFFE', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'ROHRMUFFE', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'ROHRMUFFE', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'ROHRMUFFE', 'success': False, 'error': str(e)}
     
@@ -492,74 +384,34 @@ class netcom_bw_export:
         """Export MESSPUNKT layer features filtered by job_id with display values"""
         try:
             # Find the MESSPUNKT layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'MESSPUNKT':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='MESSPUNKT')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'MESSPUNKT', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_messpunkt", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'MESSPUNKT_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('MESSPUNKT', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'MESSPUNKT', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'MESSPUNKT', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'MESSPUNKT', 'success': False, 'error': str(e)}
     
+    def find_layer(self, name=None, keyword=None):
+        """Find project layer by exact (case-insensitive) name or by name keyword (layer id cached)"""
+        return find_project_layer(name, keyword, self.layer_id_cache)
+    
+    def job_filter(self, job_id):
+        """Filter expression for job_id (value quoted by QGIS, built once per job)"""
+        if self.job_filter_cache is None or self.job_filter_cache[0] != job_id:
+            self.job_filter_cache = (job_id, QgsExpression.createFieldEqualityExpression('job_id', job_id))
+        return self.job_filter_cache[1]
+    
+    def count_features(self, layer, filter_expression):
+        """Count features matching filter_expression without fetching geometry or attributes"""
+        request = QgsFeatureRequest().setFilterExpression(filter_expression)
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setNoAttributes()
+        return sum(1 for _ in layer.getFeatures(request))
+    
     def get_value_relation_key(self, layer, field_name, display_value):
         """Get the key (ID) for a given display value in a ValueRelation field"""
         field_idx = layer.fields().indexFromName(field_name)
@@ -587,10 +439,8 @@ class netcom_bw_export:
         """Build a cache of all value relations for a layer (called once per layer)"""
         cache = {}  # {field_name: {key: value}}
         
-        for field in layer.fields():
+        for field, widget_setup in zip(layer.fields(), self.widget_setups(layer)):
             field_name = field.name()
-            field_idx = layer.fields().indexFromName(field_name)
-            widget_setup = layer.editorWidgetSetup(field_idx)
             
             if widget_setup.type() == 'ValueRelation':
                 config = widget_setup.config()
@@ -601,32 +451,143 @@ class netcom_bw_export:
                 if relation_layer_id and key_field and value_field:
                     relation_layer = QgsProject.instance().mapLayer(relation_layer_id)
                     if relation_layer:
-                        # Build lookup dictionary for this field
-                        # Store both original key and string key for flexible matching
-                        lookup = {}
-                        for rel_feature in relation_layer.getFeatures():
-                            key = rel_feature[key_field]
-                            value = rel_feature[value_field]
-                            lookup[key] = value
-                            # Also store string version of key
-                            if key is not None:
-                                lookup[str(key)] = value
-                        cache[field_name] = lookup
+                        # Build lookup dictionary for this field, keys converted to the field type
+                        pairs = [
+                            (rel_feature[key_field], rel_feature[value_field])
+                            for rel_feature in relation_layer.getFeatures()
+                        ]
+                        cache[field_name] = typed_lookup(field, pairs)
         
         return cache
     
-    def get_display_value_cached(self, feature, field_name, lookup_cache):
-        """Get display value using pre-built cache (fast)"""
-        value = feature[field_name]
-        if value is None:
-            return value
-        if field_name in lookup_cache:
-            # Try original value first, then string version
-            if value in lookup_cache[field_name]:
-                return lookup_cache[field_name][value]
-            if str(value) in lookup_cache[field_name]:
-                return lookup_cache[field_name][str(value)]
-        return value
+    def build_display_plan(self, layer, lookup_cache):
+        """Resolve value relation fields to (field index, lookup) pairs once per layer"""
+        return [
+            (field_idx, lookup_cache[field.name()])
+            for field_idx, field in enumerate(layer.fields())
+            if field.name() in lookup_cache
+        ]
+    
+    def display_attributes(self, feature, display_plan):
+        """Get feature attributes with value relation keys replaced by display values"""
+        attributes = feature.attributes()
+        for field_idx, lookup in display_plan:
+            value = attributes[field_idx]
+            # NULL (an unhashable QVariant) has no display value - skip it instead of
+            # letting the dict lookup raise
+            if value is None or isinstance(value, QVariant):
+                continue
+            attributes[field_idx] = lookup.get(value, value)
+        return attributes
+    
+    def build_sonstige_indices(self, layer, field_pairs):
+        """Resolve (field, *_SON field) name pairs to index pairs, skipping pairs with a missing field"""
+        fields = layer.fields()
+        sonstige_indices = []
+        for field_name, son_field_name in field_pairs:
+            field_idx = fields.indexFromName(field_name)
+            son_field_idx = fields.indexFromName(son_field_name)
+            if field_idx >= 0 and son_field_idx >= 0:
+                sonstige_indices.append((field_idx, son_field_idx))
+        return sonstige_indices
+    
+    def sonstige_fixup(self, layer, field_pairs, sonstige_values=SONSTIGE_VALUES):
+        """Build a row fixup replacing a 'Sonstige' value with the value of its *_SON field
+        
+        field_pairs are (field, *_SON field) names; the value is only replaced if
+        it is in sonstige_values and the *_SON field is set.
+        """
+        sonstige_indices = self.build_sonstige_indices(layer, field_pairs)
+        
+        def fixup(attributes):
+            for field_idx, son_field_idx in sonstige_indices:
+                value = attributes[field_idx]
+                if isinstance(value, str) and value in sonstige_values and attributes[son_field_idx]:
+                    attributes[field_idx] = attributes[son_field_idx]
+        return fixup
+    
+    def write_layer_export(self, label, layer, job_id, output_file, fixup=None, geometry=True,
+                           driver_name='ESRI Shapefile', layer_options=None):
+        """Write the features of job_id with display values to output_file
+        
+        fixup, if given, is called with the attribute list (display values, source
+        field order) of every feature and may change it in place. Without geometry
+        the layer is written as a table. Returns the export result dict.
+        """
+        # Check feature count with filter
+        filter_expression = self.job_filter(job_id)
+        feature_count = self.count_features(layer, filter_expression)
+        
+        if feature_count == 0:
+            return {'layer': label, 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
+        
+        # Create fields with string type for value relation fields
+        new_fields = self.build_display_fields(layer)
+        
+        # Build lookup cache
+        lookup_cache = self.build_lookup_cache(layer)
+        
+        # Write straight to the output file (no intermediate memory layer)
+        wkb_type = layer.wkbType() if geometry else QgsWkbTypes.NoGeometry
+        writer = self.create_output_writer(output_file, new_fields, wkb_type, layer.crs(), driver_name, layer_options)
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            return {'layer': label, 'success': False, 'error': writer.errorMessage()}
+        
+        # Process features with QgsFeatureRequest (tables never fetch geometries)
+        request = QgsFeatureRequest().setFilterExpression(filter_expression)
+        if not geometry:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+        # Output fields are in source field order - attributes are set positionally
+        display_plan = self.build_display_plan(layer, lookup_cache)
+        # One feature reused for every row - the writer copies it on addFeature
+        new_feature = QgsFeature(new_fields)
+        for source_feature in layer.getFeatures(request):
+            if geometry:
+                new_feature.setGeometry(source_feature.geometry())
+            
+            attributes = self.display_attributes(source_feature, display_plan)
+            if fixup is not None:
+                fixup(attributes)
+            new_feature.setAttributes(attributes)
+            
+            # Skip feature id updates
+            writer.addFeature(new_feature, QgsFeatureSink.FastInsert)
+        
+        # Flush and close the output file
+        error = writer.hasError()
+        error_message = writer.errorMessage()
+        del writer
+        
+        if error == QgsVectorFileWriter.NoError:
+            return {'layer': label, 'count': feature_count, 'file': output_file, 'success': True}
+        return {'layer': label, 'success': False, 'error': error_message}
+    
+    def widget_setups(self, layer):
+        """Editor widget setups of all layer fields, read once per layer and export run"""
+        setups = self.widget_setup_cache.get(layer.id())
+        if setups is None:
+            setups = [layer.editorWidgetSetup(field_idx) for field_idx in range(layer.fields().count())]
+            self.widget_setup_cache[layer.id()] = setups
+        return setups
+    
+    def build_display_fields(self, layer):
+        """Build output fields for a layer - ValueRelation fields become strings"""
+        new_fields = QgsFields()
+        for field, widget_setup in zip(layer.fields(), self.widget_setups(layer)):
+            build_field = DISPLAY_FIELD_BUILDERS.get(widget_setup.type(), QgsField)
+            new_fields.append(build_field(field))
+        return new_fields
+    
+    def create_output_writer(self, output_file, fields, wkb_type, crs, driver_name='ESRI Shapefile', layer_options=None):
+        """Create a UTF-8 file writer for an export (existing files are overwritten)"""
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = driver_name
+        options.fileEncoding = 'UTF-8'
+        if layer_options:
+            options.layerOptions = layer_options
+        return QgsVectorFileWriter.create(
+            output_file, fields, wkb_type, crs, QgsProject.instance().transformContext(), options
+        )
     
     def convert_feature_to_display_values(self, layer, feature):
         """Convert all field values in a feature to their display values"""
@@ -647,160 +608,32 @@ class netcom_bw_export:
     def export_bauten_layer(self, job_id, output_folder):
         """Export BAUTEN layer features filtered by job_id, with display values and ART field modification"""
         try:
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name() == 'BAUTEN' or layer.name().upper() == 'BAUTEN':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='BAUTEN')
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Apply filter based on job_id
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'BAUTEN', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_bauten", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear any existing filter
-            target_layer.setSubsetString('')
-            
-            # Build lookup cache ONCE for all value relations (huge performance boost)
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Use QgsFeatureRequest to filter features
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            
-            # Process features directly (no need to convert to list first)
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                # Convert all fields to display values using cache
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                # If ART = 'Sonstiges', replace with ART_SONST value
-                if new_feature['ART'] == 'Sonstiges':
-                    art_sonst_value = new_feature['ART_SONST']
-                    if art_sonst_value:
-                        new_feature['ART'] = art_sonst_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
+            # If ART = 'Sonstiges', replace with ART_SONST value
+            fixup = self.sonstige_fixup(target_layer, (('ART', 'ART_SONST'),), ('Sonstiges',))
             output_file = os.path.join(output_folder, f'BAUTEN_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('BAUTEN', target_layer, job_id, output_file, fixup)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'BAUTEN', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'BAUTEN', 'success': False, 'error': error[1]}
-                
         except Exception as e:
-            import traceback
             return {'layer': 'BAUTEN', 'success': False, 'error': f'{str(e)}\n{traceback.format_exc()}'}
     
     def export_netztechnik_layer(self, job_id, output_folder):
         """Export NETZTECHNIK layer features filtered by job_id with display values and ART_SONST logic"""
         try:
             # Find the NETZTECHNIK layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'NETZTECHNIK':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='NETZTECHNIK')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'NETZTECHNIK', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_netztechnik", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                # If ART = 'Sonstige', replace with ART_SONST value
-                if new_feature['ART'] == 'Sonstige':
-                    art_sonst_value = new_feature['ART_SONST']
-                    if art_sonst_value:
-                        new_feature['ART'] = art_sonst_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
+            # If ART = 'Sonstige', replace with ART_SONST value
+            fixup = self.sonstige_fixup(target_layer, (('ART', 'ART_SONST'),), ('Sonstige',))
             output_file = os.path.join(output_folder, f'NETZTECHNIK_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('NETZTECHNIK', target_layer, job_id, output_file, fixup)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'NETZTECHNIK', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'NETZTECHNIK', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'NETZTECHNIK', 'success': False, 'error': str(e)}
     
@@ -808,71 +641,14 @@ class netcom_bw_export:
         """Export ENDVERBRAUCHER layer features filtered by job_id with display values"""
         try:
             # Find the ENDVERBRAUCHER layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'ENDVERBRAUCHER':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='ENDVERBRAUCHER')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'ENDVERBRAUCHER', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_endverbraucher", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'ENDVERBRAUCHER_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('ENDVERBRAUCHER', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'ENDVERBRAUCHER', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'ENDVERBRAUCHER', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'ENDVERBRAUCHER', 'success': False, 'error': str(e)}
     
@@ -880,95 +656,22 @@ class netcom_bw_export:
         """Export Leerrohre layer features filtered by job_id with display values"""
         try:
             # Find the Leerrohre layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if 'leerrohr' in layer.name().lower():
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(keyword='leerrohr')
             
             if not target_layer or not target_layer.isValid():
                 return {'layer': 'Leerrohre', 'success': False, 'error': 'Layer not found or invalid'}
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'Leerrohre', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_leerrohre", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                # If LR_ART = 'Sonstige' or 'Sonstiges', replace with LR_SONST value
-                if new_feature['LR_ART'] in ('Sonstige', 'Sonstiges'):
-                    lr_sonst_value = new_feature['LR_SONST']
-                    if lr_sonst_value:
-                        new_feature['LR_ART'] = lr_sonst_value
-                
-                # If ER_FARB = 'Sonstige' or 'Sonstiges', replace with ER_FARB_SON value
-                if new_feature['ER_FARB'] in ('Sonstige', 'Sonstiges'):
-                    er_farb_son_value = new_feature['ER_FARB_SON']
-                    if er_farb_son_value:
-                        new_feature['ER_FARB'] = er_farb_son_value
-                
-                # If M_FARB = 'Sonstige' or 'Sonstiges', replace with M_FARB_SON value
-                if new_feature['M_FARB'] in ('Sonstige', 'Sonstiges'):
-                    m_farb_son_value = new_feature['M_FARB_SON']
-                    if m_farb_son_value:
-                        new_feature['M_FARB'] = m_farb_son_value
-                
-                # If LR_HERST = 'Sonstige' or 'Sonstiges', replace with LR_HER_SON value
-                if new_feature['LR_HERST'] in ('Sonstige', 'Sonstiges'):
-                    lr_her_son_value = new_feature['LR_HER_SON']
-                    if lr_her_son_value:
-                        new_feature['LR_HERST'] = lr_her_son_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
+            # If LR_ART, ER_FARB, M_FARB or LR_HERST = 'Sonstige' or 'Sonstiges',
+            # replace with LR_SONST, ER_FARB_SON, M_FARB_SON or LR_HER_SON value
+            fixup = self.sonstige_fixup(target_layer, (
+                ('LR_ART', 'LR_SONST'),
+                ('ER_FARB', 'ER_FARB_SON'),
+                ('M_FARB', 'M_FARB_SON'),
+                ('LR_HERST', 'LR_HER_SON'),
+            ))
             output_file = os.path.join(output_folder, f'Leerrohre_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('Leerrohre', target_layer, job_id, output_file, fixup)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'Leerrohre', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'Leerrohre', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'Leerrohre', 'success': False, 'error': str(e)}
     
@@ -976,71 +679,14 @@ class netcom_bw_export:
         """Export LINIEN layer features filtered by job_id with display values"""
         try:
             # Find the LINIEN layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'LINIEN':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='LINIEN')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'LINIEN', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_linien", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'LINIEN_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('LINIEN', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'LINIEN', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'LINIEN', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'LINIEN', 'success': False, 'error': str(e)}
     
@@ -1048,71 +694,14 @@ class netcom_bw_export:
         """Export TRASSENBAU layer features filtered by job_id with display values"""
         try:
             # Find the TRASSENBAU layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'TRASSENBAU':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='TRASSENBAU')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'TRASSENBAU', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_trassenbau", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'TRASSENBAU_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('TRASSENBAU', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'TRASSENBAU', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'TRASSENBAU', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'TRASSENBAU', 'success': False, 'error': str(e)}
     
@@ -1120,71 +709,14 @@ class netcom_bw_export:
         """Export MITVERLEGUNG layer features filtered by job_id with display values"""
         try:
             # Find the MITVERLEGUNG layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if layer.name().upper() == 'MITVERLEGUNG':
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(name='MITVERLEGUNG')
             
             if not target_layer or not target_layer.isValid():
                 return None
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'MITVERLEGUNG', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_mitverlegung", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
             output_file = os.path.join(output_folder, f'MITVERLEGUNG_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('MITVERLEGUNG', target_layer, job_id, output_file)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'MITVERLEGUNG', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'MITVERLEGUNG', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'MITVERLEGUNG', 'success': False, 'error': str(e)}
     
@@ -1192,83 +724,19 @@ class netcom_bw_export:
         """Export Verbindungen layer features filtered by job_id with display values and Sonstige logic"""
         try:
             # Find the Verbindungen layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if 'verbindung' in layer.name().lower():
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(keyword='verbindung')
             
             if not target_layer or not target_layer.isValid():
                 return {'layer': 'Verbindungen', 'success': False, 'error': 'Layer not found or invalid'}
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'Verbindungen', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer
-            geom_type = QgsWkbTypes.displayString(target_layer.wkbType())
-            temp_layer = QgsVectorLayer(f"{geom_type}?crs={target_layer.crs().authid()}", "temp_verbindungen", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                new_feature.setGeometry(source_feature.geometry())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                # If VERB_ART = 'Sonstige' or 'Sonstiges', replace with V_A_SONST value
-                if new_feature['VERB_ART'] in ('Sonstige', 'Sonstiges'):
-                    v_a_sonst_value = new_feature['V_A_SONST']
-                    if v_a_sonst_value:
-                        new_feature['VERB_ART'] = v_a_sonst_value
-                
-                # # If ER_FARB = 'Sonstige' or 'Sonstiges', replace with ER_FARB_SON value
-                # if new_feature['ER_FARB'] in ('Sonstige', 'Sonstiges'):
-                #     er_farb_son_value = new_feature['ER_FARB_SON']
-                #     if er_farb_son_value:
-                #         new_feature['ER_FARB'] = er_farb_son_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export
+            # If VERB_ART = 'Sonstige' or 'Sonstiges', replace with V_A_SONST value
+            fixup = self.sonstige_fixup(target_layer, (
+                ('VERB_ART', 'V_A_SONST'),
+                # ('ER_FARB', 'ER_FARB_SON'),
+            ))
             output_file = os.path.join(output_folder, f'Verbindungen_job_{job_id}.shp')
-            error = QgsVectorFileWriter.writeAsVectorFormat(temp_layer, output_file, 'UTF-8', temp_layer.crs(), 'ESRI Shapefile')
+            return self.write_layer_export('Verbindungen', target_layer, job_id, output_file, fixup)
             
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'Verbindungen', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'Verbindungen', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'Verbindungen', 'success': False, 'error': str(e)}
     
@@ -1276,75 +744,18 @@ class netcom_bw_export:
         """Export REL_DOKU_KABEL_ROHR table (no geometry) filtered by job_id with display values"""
         try:
             # Find the REL_DOKU_KABEL_ROHR layer
-            layers = QgsProject.instance().mapLayers()
-            target_layer = None
-            for layer_id, layer in layers.items():
-                if 'rel_doku_kabel_rohr' in layer.name().lower():
-                    target_layer = layer
-                    break
+            target_layer = self.find_layer(keyword='rel_doku_kabel_rohr')
             
             if not target_layer or not target_layer.isValid():
                 return {'layer': 'REL_DOKU_KABEL_ROHR', 'success': False, 'error': 'Layer not found or invalid'}
             
-            # Check feature count with filter
-            filter_expression = f'"job_id" = {job_id}'
-            target_layer.setSubsetString(filter_expression)
-            feature_count = target_layer.featureCount()
-            
-            if feature_count == 0:
-                target_layer.setSubsetString('')
-                return {'layer': 'REL_DOKU_KABEL_ROHR', 'success': False, 'no_data': True, 'error': f'No features found with job_id = {job_id}'}
-            
-            # Create fields with string type for value relation fields
-            new_fields = []
-            for field in target_layer.fields():
-                field_idx = target_layer.fields().indexFromName(field.name())
-                widget_setup = target_layer.editorWidgetSetup(field_idx)
-                if widget_setup.type() == 'ValueRelation':
-                    new_field = QgsField(field.name(), QVariant.String, 'String', 254)
-                else:
-                    new_field = QgsField(field)
-                new_fields.append(new_field)
-            
-            # Create temporary memory layer (no geometry)
-            temp_layer = QgsVectorLayer("None", "temp_rel_doku_kabel_rohr", "memory")
-            temp_layer.dataProvider().addAttributes(new_fields)
-            temp_layer.updateFields()
-            temp_layer.startEditing()
-            
-            # Clear filter and build lookup cache
-            target_layer.setSubsetString('')
-            lookup_cache = self.build_lookup_cache(target_layer)
-            
-            # Process features with QgsFeatureRequest
-            request = QgsFeatureRequest().setFilterExpression(f'job_id = {job_id}')
-            for source_feature in target_layer.getFeatures(request):
-                new_feature = QgsFeature(temp_layer.fields())
-                
-                for field in target_layer.fields():
-                    field_name = field.name()
-                    display_value = self.get_display_value_cached(source_feature, field_name, lookup_cache)
-                    new_feature[field_name] = display_value
-                
-                temp_layer.addFeature(new_feature)
-            
-            temp_layer.commitChanges()
-            
-            # Export to CSV (best for importing into ArcGIS geodatabase tables)
+            # CSV is best for importing into ArcGIS geodatabase tables
             output_file = os.path.join(output_folder, f'REL_DOKU_KABEL_ROHR_job_{job_id}.csv')
+            return self.write_layer_export(
+                'REL_DOKU_KABEL_ROHR', target_layer, job_id, output_file, geometry=False,
+                driver_name='CSV', layer_options=['SEPARATOR=SEMICOLON']
+            )
             
-            options = QgsVectorFileWriter.SaveVectorOptions()
-            options.driverName = 'CSV'
-            options.fileEncoding = 'UTF-8'
-            options.layerOptions = ['SEPARATOR=SEMICOLON']
-            
-            error = QgsVectorFileWriter.writeAsVectorFormatV3(temp_layer, output_file, QgsCoordinateTransformContext(), options)
-            
-            if error[0] == QgsVectorFileWriter.NoError:
-                return {'layer': 'REL_DOKU_KABEL_ROHR', 'count': temp_layer.featureCount(), 'file': output_file, 'success': True}
-            else:
-                return {'layer': 'REL_DOKU_KABEL_ROHR', 'success': False, 'error': error[1]}
-                
         except Exception as e:
             return {'layer': 'REL_DOKU_KABEL_ROHR', 'success': False, 'error': str(e)}
     
@@ -0,0 +1,306 @@
+# coding=utf-8
+"""Geodatabase export test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'nedic.darko@geodigit.rs'
+__date__ = '2025-11-28'
+__copyright__ = 'Copyright 2025, Darko Nedic'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from osgeo import ogr, osr
+from qgis.core import (
+    QgsEditorWidgetSetup,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer)
+from qgis.PyQt.QtCore import QDate, QVariant
+
+from ..export_gdb import GDBExporter, typed_lookup
+from ..field_mappings import GDB_FEATURE_CLASSES
+
+from .utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+JOB_ID = 'TEST_JOB'
+
+
+class GDBExporterTest(unittest.TestCase):
+    """Test features are written into a copy of the template geodatabase."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.output_folder = tempfile.mkdtemp()
+        self.exporter = GDBExporter(os.path.dirname(os.path.dirname(__file__)))
+        self.gdb_path = self.exporter.copy_template_gdb(self.output_folder, JOB_ID)
+        self.layers = []
+
+        # Value relation layer for ART
+        art_values = self.add_layer('None?field=key:integer&field=value:string', 'ART_WERTE', [
+            (None, [1, 'Schacht']),
+            (None, [2, 'Sonstige']),
+        ])
+        art_widget = QgsEditorWidgetSetup('ValueRelation', {
+            'Layer': art_values.id(),
+            'Key': 'key',
+            'Value': 'value',
+        })
+
+        bauten = self.add_layer(
+            'Point?crs=EPSG:25832&field=job_id:string&field=id:integer&field=ART:integer'
+            '&field=ART_SONST:string&field=BAUJAHR:integer&field=BEMERKUNG:string',
+            'BAUTEN', [
+                ((500000, 5400000), [JOB_ID, 9001, 1, None, 2020, 'Bauwerk']),
+                ((500010, 5400010), [JOB_ID, 9002, 2, 'Verteiler', None, None]),
+                ((500020, 5400020), ['OTHER_JOB', 9003, 1, None, 2021, 'Anderer Job']),
+            ])
+        bauten.setEditorWidgetSetup(bauten.fields().indexFromName('ART'), art_widget)
+
+        self.add_layer(
+            'Point?crs=EPSG:25832&field=job_id:string&field=id:integer&field=ART:string'
+            '&field=BEMERKUNG:string&field=DATUM_EINSPIELUNG:date',
+            'MESSPUNKT', [
+                ((500030, 5400030), [JOB_ID, 9010, 'Messpunkt', None, QDate(2024, 5, 17)]),
+            ])
+
+    def tearDown(self):
+        """Runs after each test."""
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+        self.exporter = None
+        shutil.rmtree(self.output_folder, ignore_errors=True)
+
+    def add_layer(self, uri, name, rows):
+        """Add a memory layer with (point, WKT or None, attributes) rows to the project"""
+        layer = QgsVectorLayer(uri, name, 'memory')
+        features = []
+        for geometry, attributes in rows:
+            feature = QgsFeature(layer.fields())
+            if isinstance(geometry, str):
+                feature.setGeometry(QgsGeometry.fromWkt(geometry))
+            elif geometry is not None:
+                feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(*geometry)))
+            feature.setAttributes(attributes)
+            features.append(feature)
+        layer.dataProvider().addFeatures(features)
+        QgsProject.instance().addMapLayer(layer)
+        self.layers.append(layer)
+        return layer
+
+    def add_value_relation(self, name, rows, key_type='integer'):
+        """Add a value relation layer with (key, value) rows, return its widget setup"""
+        values = self.add_layer(
+            f'None?field=key:{key_type}&field=value:string', name,
+            [(None, [key, value]) for key, value in rows])
+        return QgsEditorWidgetSetup('ValueRelation', {
+            'Layer': values.id(),
+            'Key': 'key',
+            'Value': 'value',
+        })
+
+    def add_ogr_layer(self, name, fields, rows):
+        """Add a GeoPackage point layer (EPSG:25832) with (name, OGR type) fields and (point, attributes) rows"""
+        path = os.path.join(self.output_folder, f'{name}.gpkg')
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(25832)
+        ogr_ds = ogr.GetDriverByName('GPKG').CreateDataSource(path)
+        ogr_layer = ogr_ds.CreateLayer(name, srs, ogr.wkbPoint)
+        for field_name, field_type in fields:
+            ogr_layer.CreateField(ogr.FieldDefn(field_name, field_type))
+        for point, attributes in rows:
+            feature = ogr.Feature(ogr_layer.GetLayerDefn())
+            feature.SetGeometry(ogr.CreateGeometryFromWkt('POINT ({} {})'.format(*point)))
+            for (field_name, field_type), value in zip(fields, attributes):
+                if value is not None:
+                    feature.SetField(field_name, value)
+            ogr_layer.CreateFeature(feature)
+        ogr_ds = None
+
+        layer = QgsVectorLayer(f'{path}|layername={name}', name, 'ogr')
+        QgsProject.instance().addMapLayer(layer)
+        self.layers.append(layer)
+        return layer
+
+    def read_rows(self, fc_name, field_names=('ART', 'BAUJAHR', 'BEMERKUNG', 'DATUM_EINSPIELUNG')):
+        """Read the rows of a geodatabase feature class by ID"""
+        gdb_ds = ogr.Open(self.gdb_path)
+        gdb_layer = gdb_ds.GetLayerByName(fc_name)
+        rows = {}
+        for feature in gdb_layer:
+            row = {
+                field_name: None if feature.IsFieldNull(field_name) else feature.GetField(field_name)
+                for field_name in field_names
+            }
+            row['has_geometry'] = feature.GetGeometryRef() is not None
+            rows[feature.GetField('ID')] = row
+        return rows
+
+    def test_export_all_to_gdb(self):
+        """Value relations, NULL, date and Sonstige values are written to COM_DOKU_PUNKT."""
+        results = {
+            result['layer']: result
+            for result in self.exporter.export_all_to_gdb(JOB_ID, self.gdb_path)
+        }
+        self.assertTrue(results['BAUTEN→GDB']['success'], results['BAUTEN→GDB'])
+        self.assertEqual(results['BAUTEN→GDB']['count'], 2)
+        self.assertTrue(results['MESSPUNKT→GDB']['success'], results['MESSPUNKT→GDB'])
+        self.assertEqual(results['MESSPUNKT→GDB']['count'], 1)
+        # Source layers not in the project are reported, not written
+        self.assertFalse(results['PUNKT→GDB']['success'])
+
+        rows = self.read_rows(GDB_FEATURE_CLASSES['punkt'])
+
+        # Value relation key replaced by its display value
+        self.assertEqual(rows[9001]['ART'], 'Schacht')
+        self.assertEqual(rows[9001]['BAUJAHR'], 2020)
+        self.assertEqual(rows[9001]['BEMERKUNG'], 'Bauwerk')
+        # ART 'Sonstige' replaced by ART_SONST, NULL attributes stay NULL
+        self.assertEqual(rows[9002]['ART'], 'Verteiler')
+        self.assertIsNone(rows[9002]['BAUJAHR'])
+        self.assertIsNone(rows[9002]['BEMERKUNG'])
+        # Other jobs are not exported
+        self.assertNotIn(9003, rows)
+        # Dates are written to the date field
+        self.assertTrue(rows[9010]['DATUM_EINSPIELUNG'].startswith('2024/05/17'))
+
+        for feature_id in (9001, 9002, 9010):
+            self.assertTrue(rows[feature_id]['has_geometry'])
+
+    def test_export_leerrohre_to_gdb(self):
+        """LR_FARBE follows TYP, Sonstige colours and LR_HERST use their *_SON values."""
+        # String keys for an integer field - matched through typed_lookup
+        typ_widget = self.add_value_relation('TYP_WERTE', [
+            ('1', 'Schutzrohr 50mm'),
+            ('2', 'Einzelrohr 12mm'),
+            ('3', 'Kabelschutzhaube'),
+        ], key_type='string')
+        farbe_widget = self.add_value_relation('FARBE_WERTE', [(1, 'rot'), (2, 'Sonstige')])
+
+        leerrohre = self.add_layer(
+            'LineString?crs=EPSG:25832&field=job_id:string&field=id:integer&field=TYP:integer'
+            '&field=M_FARB:integer&field=M_FARB_SON:string&field=ER_FARB:integer'
+            '&field=ER_FARB_SON:string&field=LR_HERST:string&field=LR_HER_SON:string',
+            'Leerrohre', [
+                ('LINESTRING (500000 5400000, 500010 5400000)',
+                 [JOB_ID, 9101, 1, 1, None, None, None, 'Gabocom', None]),
+                ('LINESTRING (500000 5400010, 500010 5400010)',
+                 [JOB_ID, 9102, 1, 2, 'lila', None, None, None, None]),
+                ('LINESTRING (500000 5400020, 500010 5400020)',
+                 [JOB_ID, 9103, 2, 1, None, 2, 'gold', 'Sonstige', 'Hersteller X']),
+                ('LINESTRING (500000 5400030, 500010 5400030)',
+                 [JOB_ID, 9104, 3, 1, None, 1, None, None, None]),
+            ])
+        fields = leerrohre.fields()
+        leerrohre.setEditorWidgetSetup(fields.indexFromName('TYP'), typ_widget)
+        leerrohre.setEditorWidgetSetup(fields.indexFromName('M_FARB'), farbe_widget)
+        leerrohre.setEditorWidgetSetup(fields.indexFromName('ER_FARB'), farbe_widget)
+
+        result = self.exporter.export_layer_to_gdb('Leerrohre', JOB_ID, self.gdb_path)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 4)
+
+        # COM_DOKU_ROHR.ID is a string field
+        rows = self.read_rows(GDB_FEATURE_CLASSES['rohr'], ('TYP', 'LR_FARBE', 'LR_HERST'))
+        # Schutzrohr: LR_FARBE from M_FARB, or M_FARB_SON if M_FARB is Sonstige
+        self.assertEqual(rows['9101']['TYP'], 'Schutzrohr 50mm')
+        self.assertEqual(rows['9101']['LR_FARBE'], 'rot')
+        self.assertEqual(rows['9101']['LR_HERST'], 'Gabocom')
+        self.assertEqual(rows['9102']['LR_FARBE'], 'lila')
+        # Einzelrohr: LR_FARBE from ER_FARB_SON, LR_HERST Sonstige replaced by LR_HER_SON
+        self.assertEqual(rows['9103']['LR_FARBE'], 'gold')
+        self.assertEqual(rows['9103']['LR_HERST'], 'Hersteller X')
+        # No colour rule for other types
+        self.assertIsNone(rows['9104']['LR_FARBE'])
+        for feature_id in ('9101', '9102', '9103', '9104'):
+            self.assertTrue(rows[feature_id]['has_geometry'])
+
+    def test_export_verbindungen_to_gdb(self):
+        """VERB_ART Sonstige uses V_A_SONST, LR_FARBE comes from ER_FARB or ER_FARB_SON."""
+        art_widget = self.add_value_relation('VERB_ART_WERTE', [(1, 'Glasfaser'), (2, 'Sonstige')])
+        farbe_widget = self.add_value_relation('FARBE_WERTE', [(1, 'rot'), (2, 'Sonstige')])
+
+        verbindungen = self.add_layer(
+            'LineString?crs=EPSG:25832&field=job_id:string&field=id:integer&field=VERB_ART:integer'
+            '&field=V_A_SONST:string&field=ER_FARB:integer&field=ER_FARB_SON:string',
+            'Verbindungen', [
+                ('LINESTRING (500000 5400000, 500010 5400000)', [JOB_ID, 9201, 1, None, 1, None]),
+                ('LINESTRING (500000 5400010, 500010 5400010)', [JOB_ID, 9202, 2, 'Kupfer', 2, 'gold']),
+                ('LINESTRING (500000 5400020, 500010 5400020)', ['OTHER_JOB', 9203, 1, None, 1, None]),
+            ])
+        fields = verbindungen.fields()
+        verbindungen.setEditorWidgetSetup(fields.indexFromName('VERB_ART'), art_widget)
+        verbindungen.setEditorWidgetSetup(fields.indexFromName('ER_FARB'), farbe_widget)
+
+        result = self.exporter.export_layer_to_gdb('Verbindungen', JOB_ID, self.gdb_path)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 2)
+
+        rows = self.read_rows(GDB_FEATURE_CLASSES['kabel'], ('ART', 'LR_FARBE'))
+        self.assertEqual(rows[9201]['ART'], 'Glasfaser')
+        self.assertEqual(rows[9201]['LR_FARBE'], 'rot')
+        self.assertEqual(rows[9202]['ART'], 'Kupfer')
+        self.assertEqual(rows[9202]['LR_FARBE'], 'gold')
+        self.assertNotIn(9203, rows)
+
+    def test_copy_export(self):
+        """Pass-through exports of file layers are appended by GDAL with the GDB field names."""
+        self.add_ogr_layer('ENDVERBRAUCHER', [
+            ('job_id', ogr.OFTString),
+            ('id', ogr.OFTInteger),
+            ('KUNDENTYP', ogr.OFTString),
+            ('KLASSE', ogr.OFTString),
+        ], [
+            ((500040, 5400040), [JOB_ID, 9301, 'Privat', 'A']),
+            ((500050, 5400050), [JOB_ID, 9302, 'Gewerbe', None]),
+            ((500060, 5400060), ['OTHER_JOB', 9303, 'Privat', 'B']),
+        ])
+
+        export = self.exporter.prepare_export('ENDVERBRAUCHER', JOB_ID)
+        # No value relation, no post transform, no edits: handed to GDAL
+        self.assertIsNotNone(export['ogr_source'])
+
+        fc_name = GDB_FEATURE_CLASSES['punkt']
+        try:
+            layer_defn = self.exporter.open_gdb_layer(self.gdb_path, fc_name)[1].GetLayerDefn()
+            field_plan = self.exporter.build_field_plan(
+                export['fields'], layer_defn, export['spec']['mapping'], export['cache'])
+            result = self.exporter.copy_export(export, self.gdb_path, fc_name, field_plan)
+        finally:
+            sync_errors = self.exporter.close_gdb(self.gdb_path)
+        self.assertEqual(sync_errors, {})
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 2)
+
+        rows = self.read_rows(fc_name, ('KUNDENTYP', 'KLASSE'))
+        self.assertEqual(rows[9301]['KUNDENTYP'], 'Privat')
+        self.assertEqual(rows[9301]['KLASSE'], 'A')
+        self.assertEqual(rows[9302]['KUNDENTYP'], 'Gewerbe')
+        self.assertIsNone(rows[9302]['KLASSE'])
+        self.assertNotIn(9303, rows)
+        self.assertTrue(rows[9301]['has_geometry'])
+
+    def test_typed_lookup(self):
+        """Keys are converted to the field type, NULL and inconvertible keys are dropped."""
+        lookup = typed_lookup(QgsField('ART', QVariant.Int), [
+            ('1', 'Schacht'),
+            (2, 'Sonstige'),
+            (None, 'Leer'),
+            ('x', 'Ungueltig'),
+        ])
+        self.assertEqual(lookup, {1: 'Schacht', 2: 'Sonstige'})
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(GDBExporterTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
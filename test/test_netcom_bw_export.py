@@ -0,0 +1,199 @@
+# coding=utf-8
+"""Shapefile export test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'nedic.darko@geodigit.rs'
+__date__ = '2025-11-28'
+__copyright__ = 'Copyright 2025, Darko Nedic'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from qgis.core import (
+    QgsEditorWidgetSetup,
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProject,
+    QgsVectorLayer)
+from qgis.PyQt.QtCore import QSettings, QVariant
+
+from ..netcom_bw_export import netcom_bw_export
+
+from .utilities import get_qgis_app
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+JOB_ID = 'TEST_JOB'
+
+
+class ShapefileExportTest(unittest.TestCase):
+    """Test layers are written to Shapefiles with display values."""
+
+    def setUp(self):
+        """Runs before each test."""
+        # The plugin reads the user locale on construction
+        if not QSettings().value('locale/userLocale'):
+            QSettings().setValue('locale/userLocale', 'en_US')
+        self.plugin = netcom_bw_export(IFACE)
+        self.output_folder = tempfile.mkdtemp()
+        self.layers = []
+
+    def tearDown(self):
+        """Runs after each test."""
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+        self.plugin = None
+        shutil.rmtree(self.output_folder, ignore_errors=True)
+
+    def add_layer(self, uri, name, rows):
+        """Add a memory layer with (point, WKT or None, attributes) rows to the project"""
+        layer = QgsVectorLayer(uri, name, 'memory')
+        features = []
+        for geometry, attributes in rows:
+            feature = QgsFeature(layer.fields())
+            if isinstance(geometry, str):
+                feature.setGeometry(QgsGeometry.fromWkt(geometry))
+            elif geometry is not None:
+                feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(*geometry)))
+            feature.setAttributes(attributes)
+            features.append(feature)
+        layer.dataProvider().addFeatures(features)
+        QgsProject.instance().addMapLayer(layer)
+        self.layers.append(layer)
+        return layer
+
+    def add_value_relation(self, name, rows, key_type='integer'):
+        """Add a value relation layer with (key, value) rows, return its widget setup"""
+        values = self.add_layer(
+            f'None?field=key:{key_type}&field=value:string', name,
+            [(None, [key, value]) for key, value in rows])
+        return QgsEditorWidgetSetup('ValueRelation', {
+            'Layer': values.id(),
+            'Key': 'key',
+            'Value': 'value',
+        })
+
+    def read_rows(self, output_file, field_names):
+        """Read the rows of an exported Shapefile by id"""
+        layer = QgsVectorLayer(output_file, 'output', 'ogr')
+        self.assertTrue(layer.isValid(), output_file)
+        rows = {}
+        for feature in layer.getFeatures():
+            row = {}
+            for field_name in field_names:
+                value = feature[field_name]
+                row[field_name] = None if value is None or isinstance(value, QVariant) else value
+            row['has_geometry'] = feature.hasGeometry()
+            rows[feature['id']] = row
+        return layer, rows
+
+    def test_export_bauten_layer(self):
+        """Value relation keys become display values, only ART 'Sonstiges' uses ART_SONST."""
+        art_widget = self.add_value_relation('ART_WERTE', [
+            (1, 'Schacht'),
+            (2, 'Sonstiges'),
+            (3, 'Sonstige'),
+        ])
+        bauten = self.add_layer(
+            'Point?crs=EPSG:25832&field=job_id:string&field=id:integer&field=ART:integer'
+            '&field=ART_SONST:string',
+            'BAUTEN', [
+                ((500000, 5400000), [JOB_ID, 9001, 1, None]),
+                ((500010, 5400010), [JOB_ID, 9002, 2, 'Verteiler']),
+                ((500020, 5400020), [JOB_ID, 9003, 3, 'Verteiler']),
+                ((500030, 5400030), ['OTHER_JOB', 9004, 1, None]),
+            ])
+        bauten.setEditorWidgetSetup(bauten.fields().indexFromName('ART'), art_widget)
+
+        result = self.plugin.export_bauten_layer(JOB_ID, self.output_folder)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['file'], os.path.join(self.output_folder, f'BAUTEN_job_{JOB_ID}.shp'))
+
+        output, rows = self.read_rows(result['file'], ('ART', 'ART_SONST'))
+        # Output columns keep the source names, value relation fields become strings
+        self.assertEqual(output.fields().names(), ['job_id', 'id', 'ART', 'ART_SONST'])
+        self.assertEqual(output.fields().field('ART').type(), QVariant.String)
+
+        self.assertEqual(rows[9001]['ART'], 'Schacht')
+        self.assertEqual(rows[9002]['ART'], 'Verteiler')
+        # BAUTEN only replaces 'Sonstiges'
+        self.assertEqual(rows[9003]['ART'], 'Sonstige')
+        self.assertNotIn(9004, rows)
+        for feature_id in (9001, 9002, 9003):
+            self.assertTrue(rows[feature_id]['has_geometry'])
+
+    def test_export_leerrohre_layer(self):
+        """Sonstige colours and manufacturers are replaced by their *_SON values."""
+        # String keys for an integer field - matched through typed_lookup
+        farbe_widget = self.add_value_relation('FARBE_WERTE', [('1', 'rot'), ('2', 'Sonstige')], key_type='string')
+        leerrohre = self.add_layer(
+            'LineString?crs=EPSG:25832&field=job_id:string&field=id:integer&field=M_FARB:integer'
+            '&field=M_FARB_SON:string&field=LR_HERST:string&field=LR_HER_SON:string',
+            'Leerrohre', [
+                ('LINESTRING (500000 5400000, 500010 5400000)', [JOB_ID, 9101, 1, None, 'Gabocom', None]),
+                ('LINESTRING (500000 5400010, 500010 5400010)', [JOB_ID, 9102, 2, 'lila', 'Sonstige', 'Hersteller X']),
+                ('LINESTRING (500000 5400020, 500010 5400020)', [JOB_ID, 9103, 2, None, 'Sonstiges', None]),
+            ])
+        leerrohre.setEditorWidgetSetup(leerrohre.fields().indexFromName('M_FARB'), farbe_widget)
+
+        result = self.plugin.export_leerrohre_layer(JOB_ID, self.output_folder)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 3)
+
+        output, rows = self.read_rows(result['file'], ('M_FARB', 'LR_HERST'))
+        self.assertEqual(output.fields().field('M_FARB').type(), QVariant.String)
+        self.assertEqual(rows[9101]['M_FARB'], 'rot')
+        self.assertEqual(rows[9101]['LR_HERST'], 'Gabocom')
+        self.assertEqual(rows[9102]['M_FARB'], 'lila')
+        self.assertEqual(rows[9102]['LR_HERST'], 'Hersteller X')
+        # Without a *_SON value the display value stays
+        self.assertEqual(rows[9103]['M_FARB'], 'Sonstige')
+        self.assertEqual(rows[9103]['LR_HERST'], 'Sonstiges')
+
+    def test_export_verbindungen_layer(self):
+        """VERB_ART 'Sonstige' is replaced by V_A_SONST."""
+        art_widget = self.add_value_relation('VERB_ART_WERTE', [(1, 'Glasfaser'), (2, 'Sonstige')])
+        verbindungen = self.add_layer(
+            'LineString?crs=EPSG:25832&field=job_id:string&field=id:integer&field=VERB_ART:integer'
+            '&field=V_A_SONST:string',
+            'Verbindungen', [
+                ('LINESTRING (500000 5400000, 500010 5400000)', [JOB_ID, 9201, 1, None]),
+                ('LINESTRING (500000 5400010, 500010 5400010)', [JOB_ID, 9202, 2, 'Kupfer']),
+            ])
+        verbindungen.setEditorWidgetSetup(verbindungen.fields().indexFromName('VERB_ART'), art_widget)
+
+        result = self.plugin.export_verbindungen_layer(JOB_ID, self.output_folder)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['count'], 2)
+
+        output, rows = self.read_rows(result['file'], ('VERB_ART',))
+        self.assertEqual(output.fields().names(), ['job_id', 'id', 'VERB_ART', 'V_A_SONST'])
+        self.assertEqual(rows[9201]['VERB_ART'], 'Glasfaser')
+        self.assertEqual(rows[9202]['VERB_ART'], 'Kupfer')
+
+    def test_export_without_job_features(self):
+        """Layers without features of the job are reported as having no data."""
+        self.add_layer(
+            'Point?crs=EPSG:25832&field=job_id:string&field=id:integer&field=ART:integer'
+            '&field=ART_SONST:string',
+            'BAUTEN', [
+                ((500000, 5400000), ['OTHER_JOB', 9001, 1, None]),
+            ])
+
+        result = self.plugin.export_bauten_layer(JOB_ID, self.output_folder)
+        self.assertFalse(result['success'])
+        self.assertTrue(result['no_data'])
+        self.assertFalse(os.path.exists(os.path.join(self.output_folder, f'BAUTEN_job_{JOB_ID}.shp')))
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(ShapefileExportTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)